@@ -0,0 +1,158 @@
+import argparse
+import math
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from CSRGraph import CSRGraph
+from PathFinder import expand
+
+# sources per block; each block returns an n-length partial sum, so blocks
+# trade scheduling granularity against the partials shipped back
+BLOCK_SOURCES = 16
+
+
+class BrandesState:
+    """Per-process BFS arrays, allocated once and reset after every source."""
+
+    def __init__(self, graph: CSRGraph):
+        self.graph = graph
+        n = graph.num_nodes
+        self.dist = np.full(n, -1, dtype=np.int32)
+        self.sigma = np.zeros(n, dtype=np.float64)
+        self.delta = np.zeros(n, dtype=np.float64)
+
+    def accumulate(self, source: int, betweenness: np.ndarray):
+        """Add source's dependencies delta_s(v) to betweenness (Brandes, level by level)."""
+        offsets, targets = self.graph.offsets, self.graph.targets
+        dist, sigma, delta = self.dist, self.sigma, self.delta
+        dist[source] = 0
+        sigma[source] = 1.0
+        levels = [np.array([source], dtype=np.int32)]
+
+        # forward BFS, counting shortest paths one level at a time
+        while True:
+            frontier = levels[-1]
+            depth = len(levels)
+            counts = offsets[frontier + 1] - offsets[frontier]
+            parents = np.repeat(frontier, counts)
+            children = expand(offsets, targets, frontier)
+            new = np.unique(children[dist[children] < 0])
+            if not new.size:
+                break
+            dist[new] = depth
+            on_dag = dist[children] == depth
+            np.add.at(sigma, children[on_dag], sigma[parents[on_dag]])
+            levels.append(new)
+
+        # back-propagate dependencies from the deepest level up
+        for depth in range(len(levels) - 2, -1, -1):
+            frontier = levels[depth]
+            counts = offsets[frontier + 1] - offsets[frontier]
+            parents = np.repeat(frontier, counts)
+            children = expand(offsets, targets, frontier)
+            on_dag = dist[children] == depth + 1
+            parents, children = parents[on_dag], children[on_dag]
+            np.add.at(
+                delta, parents, sigma[parents] / sigma[children] * (1.0 + delta[children])
+            )
+
+        visited = np.concatenate(levels)
+        delta[source] = 0.0
+        betweenness[visited] += delta[visited]
+        dist[visited] = -1
+        sigma[visited] = 0.0
+        delta[visited] = 0.0
+
+
+_state: BrandesState | None = None
+
+
+def _init_worker(graph_path: str):
+    """Each pool process maps the same file, so the graph is shared through the page cache."""
+    global _state
+    _state = BrandesState(CSRGraph(graph_path))
+
+
+def _accumulate_sources(sources: np.ndarray) -> np.ndarray:
+    betweenness = np.zeros(_state.graph.num_nodes, dtype=np.float64)
+    for source in sources.tolist():
+        _state.accumulate(source, betweenness)
+    return betweenness
+
+
+class BetweennessResult:
+    def __init__(self, scores: np.ndarray, error_bound: float, confidence: float, k: int, seed: int):
+        self.scores = scores
+        """Estimated normalized betweenness of every node, in [0, 1]."""
+
+        self.error_bound = error_bound
+        """With probability confidence, every score is within this of the exact value."""
+
+        self.confidence = confidence
+        self.k = k
+        """Number of sampled source pivots."""
+
+        self.seed = seed
+
+
+def approximate_betweenness(
+    graph_path: str,
+    k: int,
+    seed: int = 0,
+    workers: int | None = None,
+    confidence: float = 0.95,
+) -> BetweennessResult:
+    """
+    Estimate normalized betweenness from k uniformly sampled source pivots.
+    Sources are split into contiguous blocks of BLOCK_SOURCES and the
+    partial sums are added in block order, so a seed gives the same scores
+    with any number of workers. Graphs of two nodes or fewer have no betweenness.
+
+    Each pivot contributes delta_s(v) / (n - 2), a value in [0, 1], so by
+    Hoeffding's inequality and a union bound over the n nodes every estimate
+    is within n / (n - 1) * sqrt(ln(2n / (1 - confidence)) / 2k) of the
+    exact normalized betweenness with probability confidence.
+    """
+    with CSRGraph(graph_path) as graph:
+        n = graph.num_nodes
+    if n <= 2:
+        return BetweennessResult(np.zeros(n, dtype=np.float64), 0.0, confidence, min(k, n), seed)
+    workers = workers or os.cpu_count() or 1
+    rng = np.random.default_rng(seed)
+    sources = rng.choice(n, size=min(k, n), replace=False).astype(np.int32)
+    blocks = np.array_split(sources, max(-(-len(sources) // BLOCK_SOURCES), 1))
+
+    total = np.zeros(n, dtype=np.float64)
+    with mp.Pool(workers, initializer=_init_worker, initargs=(graph_path,)) as pool:
+        for partial in pool.imap(_accumulate_sources, blocks):  # in block order
+            total += partial
+
+    k = len(sources)
+    scale = n / (k * (n - 1) * (n - 2))
+    error_bound = n / (n - 1) * math.sqrt(math.log(2 * n / (1 - confidence)) / (2 * k))
+    return BetweennessResult(total * scale, error_bound, confidence, k, seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Approximate betweenness centrality by source sampling.")
+    parser.add_argument("--graph", default="wikipedia_graph.csr", help="CSR graph file")
+    parser.add_argument("-k", type=int, default=1000, help="number of sampled source pivots")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help=".npy file to save scores to")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    result = approximate_betweenness(args.graph, args.k, args.seed, args.workers)
+    print(
+        f"Sampled {result.k} sources in {time.time() - start_time:.2f} seconds, "
+        f"error bound {result.error_bound:.4g} at {result.confidence:.0%} confidence"
+    )
+    with CSRGraph(args.graph) as G:
+        for v in np.argsort(result.scores)[::-1][:10].tolist():
+            print(f"  {G.title(v)}: {result.scores[v]:.6f}")
+    if args.output:
+        np.save(args.output, result.scores)
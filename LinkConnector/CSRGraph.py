@@ -0,0 +1,360 @@
+import argparse
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+from typing import Iterable
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LoadLinks"))
+from RecordFile import decodeTitleLinks, readRecords
+from RedirectTable import RedirectTable, resolveEdges
+from TitleDictionary import TitleDictionary
+from TitleTable import TitleTable, header_digest
+
+# File layout, all little-endian and 8-byte aligned:
+#   magic (8 bytes), num_nodes (u64), num_edges (u64),
+#   one (start, length) u64 pair per section in SECTIONS order,
+#   then the sections. Absent sections have length 0.
+MAGIC = b"WLCSR\x00\x00\x01"
+SECTIONS = (
+    "offsets",  # int64[num_nodes + 1], out-edges of v are targets[offsets[v]:offsets[v + 1]]
+    "targets",  # int32[num_edges], sorted within each node
+    "title_offsets",  # int64[num_nodes + 1] into title_data
+    "title_data",  # utf-8 titles back to back
+    "rev_offsets",  # int64[num_nodes + 1], optional reverse (backlink) index
+    "rev_sources",  # int32[num_edges]
+)
+_HEADER = struct.Struct("<8sQQ" + "QQ" * len(SECTIONS))
+HEADER_SIZE = _HEADER.size
+_DTYPES = {
+    "offsets": np.int64,
+    "targets": np.int32,
+    "title_offsets": np.int64,
+    "title_data": np.uint8,
+    "rev_offsets": np.int64,
+    "rev_sources": np.int32,
+}
+
+
+def csr_from_edges(edges: np.ndarray, num_nodes: int) -> tuple[np.ndarray, np.ndarray]:
+    """Sort and de-duplicate (source, target) rows into (offsets, targets)."""
+    keys = np.unique(
+        (edges[:, 0].astype(np.uint64) << 32) | edges[:, 1].astype(np.uint64)
+    )
+    sources = (keys >> 32).astype(np.int64)
+    targets = (keys & 0xFFFFFFFF).astype(np.int32)
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=offsets[1:])
+    return offsets, targets
+
+
+def transpose_csr(offsets: np.ndarray, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the (offsets, sources) of the reverse graph."""
+    num_nodes = len(offsets) - 1
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int32), np.diff(offsets))
+    order = np.argsort(targets, kind="stable")  # keeps sources sorted per target
+    rev_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=num_nodes), out=rev_offsets[1:])
+    return rev_offsets, sources[order]
+
+
+def pack_header(num_nodes: int, num_edges: int, table: list[int]) -> bytes:
+    """The file header, table holding one (start, length) pair per section."""
+    return _HEADER.pack(MAGIC, num_nodes, num_edges, *table)
+
+
+def write_csr(
+    path: str,
+    offsets: np.ndarray,
+    targets: np.ndarray,
+    titles: list[str],
+    reverse: bool = True,
+):
+    """Write a CSR graph file, with the backlink index unless reverse=False."""
+    encoded = [t.encode("utf-8") for t in titles]
+    title_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in encoded], out=title_offsets[1:])
+    sections = {
+        "offsets": np.asarray(offsets, dtype=np.int64),
+        "targets": np.asarray(targets, dtype=np.int32),
+        "title_offsets": title_offsets,
+        "title_data": b"".join(encoded),
+    }
+    if reverse:
+        sections["rev_offsets"], sections["rev_sources"] = transpose_csr(
+            sections["offsets"], sections["targets"]
+        )
+
+    table = []
+    position = HEADER_SIZE
+    for name in SECTIONS:
+        data = sections.get(name, b"")
+        position += -position % 8
+        table += [position, len(memoryview(data).cast("B"))]
+        position += table[-1]
+
+    with open(path, "wb") as f:
+        f.write(pack_header(len(offsets) - 1, len(targets), table))
+        for name, start in zip(SECTIONS, table[::2]):
+            f.write(b"\x00" * (start - f.tell()))
+            f.write(memoryview(sections.get(name, b"")).cast("B"))
+
+
+class CSRGraph:
+    """
+    Read-only link graph backed by a memory-mapped CSR file. Opening only
+    reads the header, every array is a view straight into the mapping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_nodes, self.num_edges, *table = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a CSR graph file")
+        self._sections: dict[str, np.ndarray] = {}
+        for name, start, length in zip(SECTIONS, table[::2], table[1::2]):
+            dtype = np.dtype(_DTYPES[name])
+            self._sections[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=length // dtype.itemsize, offset=start
+            )
+        self.offsets = self._sections["offsets"]
+        self.targets = self._sections["targets"]
+        self.digest = header_digest(self._mmap[: _HEADER.size])
+        """Checksum of the header, stored in title tables built for this graph."""
+
+        self._title_ids: dict[str, int] | None = None
+        self.titles: TitleTable | None = None
+        """The GRAPH.titles table (TitleTable.py) next to the file, if one was built for it."""
+        if os.path.exists(path + ".titles"):
+            self.titles = self._open_titles(path + ".titles")
+        self._reverse: tuple[np.ndarray, np.ndarray] | None = None
+        if len(self._sections["rev_offsets"]):
+            self._reverse = (self._sections["rev_offsets"], self._sections["rev_sources"])
+
+    def _open_titles(self, path: str) -> TitleTable | None:
+        """The title table at path, or None with a warning if it is not this graph's."""
+        try:
+            table = TitleTable(path)
+        except ValueError as e:
+            print(f"Ignoring {path}: {e}")
+            return None
+        if table.num_titles != self.num_nodes or table.graph_digest != self.digest:
+            print(f"Ignoring {path}: built for another graph, rebuild it with TitleTable.py")
+            table.close()
+            return None
+        return table
+
+    def neighbors(self, node: int) -> np.ndarray:
+        """Out-links of node."""
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    @property
+    def reverse(self) -> tuple[np.ndarray, np.ndarray]:
+        """(rev_offsets, rev_sources), built in memory if the file has none."""
+        if self._reverse is None:
+            self._reverse = transpose_csr(self.offsets, self.targets)
+        return self._reverse
+
+    def predecessors(self, node: int) -> np.ndarray:
+        """Pages linking to node (backlinks)."""
+        rev_offsets, rev_sources = self.reverse
+        return rev_sources[rev_offsets[node] : rev_offsets[node + 1]]
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.reverse[0])
+
+    def title(self, node: int) -> str:
+        title_offsets = self._sections["title_offsets"]
+        data = self._sections["title_data"][title_offsets[node] : title_offsets[node + 1]]
+        return data.tobytes().decode("utf-8")
+
+    def find(self, title: str) -> int | None:
+        """
+        Node id of title, or None. Goes through the title table if there is
+        one (which also tries the normalized title), otherwise through a
+        dict built on first use.
+        """
+        if self.titles is not None:
+            return self.titles.find(title)
+        if self._title_ids is None:
+            self._title_ids = {self.title(v): v for v in range(self.num_nodes)}
+        return self._title_ids.get(title)
+
+    def close(self):
+        self._sections.clear()
+        self.offsets = self.targets = None  # release the views before unmapping
+        self._reverse = None
+        if self.titles is not None:
+            self.titles.close()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # arrays handed out are still alive, the mapping goes with them
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def convert_edges(
+    edges_path: str, titles_path: str, output_path: str, redirects_path: str | None = None
+):
+    """Convert CompressedLoader's enwiki_edges.bin + enwiki_titles.txt."""
+    edges = np.fromfile(edges_path, dtype=np.int32).reshape(-1, 2)
+    titles = TitleDictionary.load(titles_path).titles
+    if redirects_path:
+        edges = resolveEdges(edges, RedirectTable.load(redirects_path).canonical(len(titles)))
+    write_csr(output_path, *csr_from_edges(edges, len(titles)), titles)
+
+
+def convert_title_links(pages, output_path: str, redirects_path: str | None = None):
+    """Convert an iterable of (title, [link titles]), interning the titles."""
+    titles = TitleDictionary()
+    sources, targets = [], []
+    for page, links in pages:
+        page_id = titles.getId(page)
+        link_ids = titles.idsOf(links)
+        sources.append(np.full(len(link_ids), page_id, dtype=np.int32))
+        targets.append(link_ids)
+    edges = np.column_stack(
+        (np.concatenate(sources or [[]]), np.concatenate(targets or [[]]))
+    ).astype(np.int32)
+    if redirects_path:
+        table = RedirectTable.fromTsv(redirects_path, titles)
+        edges = resolveEdges(edges, table.canonical(len(titles)))
+    write_csr(output_path, *csr_from_edges(edges, len(titles)), titles.titles)
+
+
+def convert_jsonl(jsonl_path: str, output_path: str, redirects_path: str | None = None):
+    """Convert {page_name: [links]} JSONL output."""
+
+    def pages():
+        with open(jsonl_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield from json.loads(line).items()
+
+    convert_title_links(pages(), output_path, redirects_path)
+
+
+def convert_records(records_path: str, output_path: str, redirects_path: str | None = None):
+    """Convert the loaders' RecordFile of title-links records."""
+    pages = (decodeTitleLinks(record) for record in readRecords(records_path))
+    convert_title_links(pages, output_path, redirects_path)
+
+
+def convert_pickle(pickle_path: str, output_path: str, redirects_path: str | None = None):
+    """
+    Convert a pickled nx.DiGraph (wikipedia_graph.pkl) or (title, links) list.
+    redirects_path only applies to the list, a graph is converted as it is.
+    """
+    with open(pickle_path, "rb") as f:
+        data = pickle.load(f)
+    if not hasattr(data, "adjacency"):
+        convert_title_links(data, output_path, redirects_path)
+        return
+
+    nodes = list(data.nodes)
+    if "titles" in data.graph:  # int nodes from Grapher.create_graph_from_edges
+        titles = [data.graph["titles"][n] for n in nodes]
+    else:
+        titles = [str(n) for n in nodes]
+    index = {n: i for i, n in enumerate(nodes)}
+    edges = np.array(
+        [(index[u], index[v]) for u, v in data.edges], dtype=np.int32
+    ).reshape(-1, 2)
+    write_csr(output_path, *csr_from_edges(edges, len(nodes)), titles)
+
+
+def patch_csr(
+    graph_path: str,
+    output_path: str,
+    updated: dict[str, list[str]],
+    removed: Iterable[str] = (),
+    redirects_path: str | None = None,
+):
+    """
+    Apply an IncrementalLoader change set to an existing graph: the out-links
+    of updated pages are replaced, removed pages lose theirs and new titles
+    are appended, so existing node ids stay stable. Removed titles the
+    graph does not know (redirects, pages never linked to) are ignored.
+    New links are resolved through redirects_path (a .tsv). Edges of
+    untouched pages keep the redirect resolution they were built with
+    until a full rebuild.
+    """
+    with CSRGraph(graph_path) as graph:
+        titles = TitleDictionary([graph.title(v) for v in range(graph.num_nodes)])
+        offsets, targets = np.array(graph.offsets), np.array(graph.targets)
+        reverse = graph._reverse is not None
+    old_nodes = len(titles)
+
+    sources, new_targets = [], []
+    for page, links in updated.items():
+        link_ids = titles.idsOf(links)
+        sources.append(np.full(len(link_ids), titles.getId(page), dtype=np.int32))
+        new_targets.append(link_ids)
+    removed_ids = [node for node in map(titles.find, removed) if node is not None]
+    touched = np.zeros(len(titles), dtype=bool)  # sized after every new title is interned
+    touched[titles.idsOf(list(updated))] = True
+    touched[removed_ids] = True
+
+    # keep the untouched rows and add the replacements
+    kept_sources = np.repeat(np.arange(old_nodes, dtype=np.int32), np.diff(offsets))
+    keep = ~touched[kept_sources]
+    edges = np.column_stack(
+        (
+            np.concatenate([kept_sources[keep], *sources]),
+            np.concatenate([targets[keep], *new_targets]),
+        )
+    ).astype(np.int32)
+    if redirects_path:
+        changed = np.arange(len(edges)) >= np.count_nonzero(keep)
+        canon = RedirectTable.fromTsv(redirects_path, titles).canonical(len(titles))
+        edges[changed, 1] = canon[edges[changed, 1]]
+        edges = edges[~changed | (edges[:, 0] != edges[:, 1])]
+    write_csr(output_path, *csr_from_edges(edges, len(titles)), titles.titles, reverse)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert link outputs to a CSR graph file.")
+    parser.add_argument("input", help=".rec, .pkl, .jsonl, enwiki_edges.bin or a graph to --patch")
+    parser.add_argument("output", help="CSR graph file to write")
+    parser.add_argument("--titles", help="titles file, for .bin edge input")
+    parser.add_argument("--redirects", help="redirects file (.bin for edges, .tsv otherwise)")
+    parser.add_argument(
+        "--patch", help="IncrementalLoader change set (.json) to apply to the input graph"
+    )
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if args.patch:
+        with open(args.patch, encoding="utf-8") as f:
+            changes = json.load(f)
+        patch_csr(args.input, args.output, changes["updated"], changes["removed"], args.redirects)
+    elif args.input.endswith(".bin"):
+        convert_edges(args.input, args.titles, args.output, args.redirects)
+    elif args.input.endswith(".rec"):
+        convert_records(args.input, args.output, args.redirects)
+    elif args.input.endswith(".jsonl"):
+        convert_jsonl(args.input, args.output, args.redirects)
+    else:
+        convert_pickle(args.input, args.output, args.redirects)
+    print(f"Wrote {args.output} in {time.time() - start_time:.2f} seconds")
+
+    start_time = time.time()
+    with CSRGraph(args.output) as G:
+        print(
+            f"Opened {args.output} ({G.num_nodes} nodes, {G.num_edges} edges) in {(time.time() - start_time) * 1000:.2f} ms"
+        )
@@ -0,0 +1,239 @@
+import argparse
+import time
+
+import numpy as np
+
+from CSRGraph import CSRGraph, csr_from_edges
+from PathFinder import expand
+
+EDGE_CHUNK = 1 << 25  # edges relabelled per pass when building the condensation
+
+
+def _distinct(nodes: np.ndarray) -> np.ndarray:
+    """Sorted distinct nodes; sorting beats np.unique's hashing on big frontiers."""
+    nodes = np.sort(nodes)
+    return nodes[np.r_[True, nodes[1:] != nodes[:-1]]] if nodes.size else nodes
+
+
+def _reach(offsets: np.ndarray, adjacency: np.ndarray, seeds: np.ndarray, blocked: np.ndarray) -> np.ndarray:
+    """Nodes reachable from seeds without entering blocked nodes, as a bool mask."""
+    visited = blocked.copy()
+    frontier = np.asarray(seeds, dtype=np.int64)
+    frontier = frontier[~visited[frontier]]
+    visited[frontier] = True
+    while frontier.size:
+        found = expand(offsets, adjacency, frontier)
+        frontier = _distinct(found[~visited[found]])
+        visited[frontier] = True
+    return visited & ~blocked
+
+
+def _trim(graph: CSRGraph, labels: np.ndarray, next_label: int) -> int:
+    """
+    Repeatedly give nodes without a remaining in- or out-link their own
+    component; such nodes cannot be on a cycle. Returns the next free label.
+    """
+    offsets, targets = graph.offsets, graph.targets
+    rev_offsets, rev_sources = graph.reverse
+    out_degree = np.diff(offsets)
+    in_degree = np.diff(rev_offsets)
+    frontier = np.flatnonzero((out_degree == 0) | (in_degree == 0))
+    while frontier.size:
+        labels[frontier] = np.arange(next_label, next_label + len(frontier))
+        next_label += len(frontier)
+        successors = expand(offsets, targets, frontier)
+        np.subtract.at(in_degree, successors, 1)
+        predecessors = expand(rev_offsets, rev_sources, frontier)
+        np.subtract.at(out_degree, predecessors, 1)
+        touched = np.concatenate((successors, predecessors))
+        touched = touched[labels[touched] < 0]
+        frontier = _distinct(touched[(in_degree[touched] == 0) | (out_degree[touched] == 0)])
+    return next_label
+
+
+def _tarjan(offsets: list[int], targets: list[int]) -> list[int]:
+    """Iterative Tarjan over list-based CSR; returns a component label per node."""
+    n = len(offsets) - 1
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    component = [-1] * n
+    stack: list[int] = []
+    counter = num_components = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, offsets[root])]
+        while work:
+            v, i = work[-1]
+            end = offsets[v + 1]
+            while i < end:
+                w = targets[i]
+                i += 1
+                if index[w] < 0:
+                    work[-1] = (v, i)
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, offsets[w]))
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component[w] = num_components
+                        if w == v:
+                            break
+                    num_components += 1
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+    return component
+
+
+def strongly_connected_components(graph: CSRGraph, trim: bool = True) -> np.ndarray:
+    """
+    Component id of every node as an int32 array, numbered by decreasing
+    component size (0 is the giant SCC). Trimming first peels nodes that
+    cannot be on a cycle, a forward-backward search from the best-connected
+    remaining node then takes out the giant component in a few array
+    passes, and iterative Tarjan labels whatever is left.
+    """
+    n = graph.num_nodes
+    offsets, targets = graph.offsets, graph.targets
+    rev_offsets, rev_sources = graph.reverse
+    labels = np.full(n, -1, dtype=np.int64)
+    next_label = _trim(graph, labels, 0) if trim else 0
+
+    remaining = labels < 0
+    if remaining.any():
+        degree = np.diff(offsets) * np.diff(rev_offsets)
+        pivot = int(np.argmax(np.where(remaining, degree, -1)))
+        forward = _reach(offsets, targets, np.array([pivot]), ~remaining)
+        backward = _reach(rev_offsets, rev_sources, np.array([pivot]), ~remaining)
+        labels[forward & backward] = next_label
+        next_label += 1
+        remaining &= ~(forward & backward)
+
+    nodes = np.flatnonzero(remaining)
+    if nodes.size:
+        local = np.full(n, -1, dtype=np.int64)
+        local[nodes] = np.arange(len(nodes))
+        edge_targets = local[expand(offsets, targets, nodes)]
+        edge_sources = np.repeat(np.arange(len(nodes)), offsets[nodes + 1] - offsets[nodes])
+        keep = edge_targets >= 0
+        sub_offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_sources[keep], minlength=len(nodes)), out=sub_offsets[1:])
+        component = np.array(_tarjan(sub_offsets.tolist(), edge_targets[keep].tolist()), dtype=np.int64)
+        labels[nodes] = next_label + component
+
+    sizes = np.bincount(labels)
+    rank = np.empty(len(sizes), dtype=np.int32)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes), dtype=np.int32)
+    return rank[labels]
+
+
+def condensation(graph: CSRGraph, components: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(offsets, targets) of the DAG of components, one edge per linked pair."""
+    num_components = int(components.max()) + 1 if len(components) else 0
+    sources = np.repeat(np.arange(graph.num_nodes, dtype=np.int32), np.diff(graph.offsets))
+    keys = []
+    for start in range(0, graph.num_edges, EDGE_CHUNK):
+        end = start + EDGE_CHUNK
+        edges = np.column_stack((components[sources[start:end]], components[graph.targets[start:end]]))
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        keys.append(np.unique((edges[:, 0].astype(np.uint64) << 32) | edges[:, 1].astype(np.uint64)))
+    keys = np.unique(np.concatenate(keys)) if keys else np.empty(0, dtype=np.uint64)
+    edges = np.column_stack((keys >> 32, keys & 0xFFFFFFFF)).astype(np.int64)
+    return csr_from_edges(edges, num_components)
+
+
+def component_stats(components: np.ndarray, dag: tuple[np.ndarray, np.ndarray] | None = None) -> dict:
+    """
+    Summary of a labelling from strongly_connected_components: counts,
+    the giant component's share and a power-of-two size histogram
+    ([low, high, components] rows). With the condensation, also its edge
+    count and how many components have no incoming or outgoing links.
+    """
+    sizes = np.bincount(components)
+    n = len(components)
+    bins = np.floor(np.log2(sizes)).astype(np.int64)
+    histogram = [
+        [1 << int(b), (1 << (int(b) + 1)) - 1, int(count)]
+        for b, count in enumerate(np.bincount(bins))
+        if count
+    ]
+    stats = {
+        "nodes": n,
+        "components": len(sizes),
+        "giant_size": int(sizes[0]) if len(sizes) else 0,
+        "giant_fraction": float(sizes[0] / n) if n else 0.0,
+        "singletons": int((sizes == 1).sum()),
+        "size_histogram": histogram,
+    }
+    if dag is not None:
+        dag_offsets, dag_targets = dag
+        in_degree = np.bincount(dag_targets, minlength=len(sizes))
+        stats["dag_edges"] = len(dag_targets)
+        stats["source_components"] = int((in_degree == 0).sum())
+        stats["sink_components"] = int((np.diff(dag_offsets) == 0).sum())
+    return stats
+
+
+def reachability(graph: CSRGraph, node: int) -> dict:
+    """How many nodes can reach node, and how many node reaches."""
+    blocked = np.zeros(graph.num_nodes, dtype=bool)
+    seeds = np.array([node])
+    reaches = _reach(*graph.reverse, seeds, blocked)
+    reached = _reach(graph.offsets, graph.targets, seeds, blocked)
+    n = max(graph.num_nodes, 1)
+    return {
+        "can_reach": int(reaches.sum()),
+        "can_reach_fraction": float(reaches.sum() / n),
+        "reachable_from": int(reached.sum()),
+        "reachable_from_fraction": float(reached.sum() / n),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strongly connected components of a CSR graph.")
+    parser.add_argument("--graph", default="wikipedia_graph.csr", help="CSR graph file")
+    parser.add_argument("--output", default=None, help=".npy file to save component ids to")
+    parser.add_argument("--reach", nargs="*", default=[], help="titles to report reachability for")
+    parser.add_argument("--no-trim", action="store_true", help="skip the trimming pass")
+    args = parser.parse_args()
+
+    with CSRGraph(args.graph) as G:
+        G.reverse
+        start_time = time.time()
+        components = strongly_connected_components(G, trim=not args.no_trim)
+        print(f"Found {components.max() + 1} components in {time.time() - start_time:.2f} seconds")
+        stats = component_stats(components, condensation(G, components))
+        for key, value in stats.items():
+            if key != "size_histogram":
+                print(f"  {key}: {value}")
+        for low, high, count in stats["size_histogram"]:
+            print(f"  size {low}-{high}: {count} components")
+        for title in args.reach:
+            node = G.find(title)
+            if node is None:
+                print(f"{title}: not in the graph")
+                continue
+            report = reachability(G, node)
+            print(
+                f"{title}: reached from {report['can_reach']} pages ({report['can_reach_fraction']:.2%}), "
+                f"reaches {report['reachable_from']} ({report['reachable_from_fraction']:.2%}), "
+                f"{'in' if components[node] == 0 else 'outside'} the giant SCC"
+            )
+        if args.output:
+            np.save(args.output, components)
@@ -0,0 +1,341 @@
+import argparse
+import mmap
+import struct
+import time
+
+import numpy as np
+
+from CSRGraph import CSRGraph
+
+# WebGraph-style successor lists. Every node's list is written as varints:
+#   degree, zigzag(first target - node), then gap - 1 to each next target
+# (lists are sorted and duplicate-free, so gaps are >= 1). The sparse index
+# holds the byte offset of every interval-th node's list; a lookup decodes
+# the varints of one interval and walks the degrees to the list it wants.
+# File layout, little-endian and 8-byte aligned: magic, num_nodes,
+# num_edges, interval, one (start, length) u64 pair per section.
+MAGIC = b"WLCGR\x00\x00\x01"
+SECTIONS = (
+    "index",  # uint64[num_blocks + 1] byte offsets into data
+    "data",  # varint successor lists
+    "title_offsets",  # int64[num_nodes + 1] into title_data
+    "title_data",  # utf-8 titles back to back
+    "rev_index",  # optional predecessor lists, same encoding
+    "rev_data",
+)
+_HEADER = struct.Struct("<8sQQQ" + "QQ" * len(SECTIONS))
+_DTYPES = {
+    "index": np.uint64,
+    "data": np.uint8,
+    "title_offsets": np.int64,
+    "title_data": np.uint8,
+    "rev_index": np.uint64,
+    "rev_data": np.uint8,
+}
+NODE_CHUNK = 1 << 20  # nodes encoded per numpy pass, bounds the temporary arrays
+
+
+def encode_varints(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """LEB128-encode non-negative int64 values. Returns (bytes, bytes per value)."""
+    values = values.astype(np.uint64)
+    sizes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        sizes += values >= np.uint64(1 << (7 * k))
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+    starts = np.cumsum(sizes) - sizes
+    for k in range(int(sizes.max(initial=0))):
+        more = sizes > k
+        byte = (values[more] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        byte |= (sizes[more] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[more] + k] = byte
+    return out, sizes
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """Decode back-to-back LEB128 varints into int64 values."""
+    ends = np.flatnonzero(data < 0x80)
+    if not len(ends):
+        return np.empty(0, dtype=np.int64)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    shifts = 7 * (np.arange(len(data)) - np.repeat(starts, ends - starts + 1))
+    payload = (data & 0x7F).astype(np.int64) << shifts
+    return np.add.reduceat(payload, starts)
+
+
+def _encode_lists(
+    offsets: np.ndarray, targets: np.ndarray, first: int, last: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Encode the lists of nodes [first, last). Returns (bytes, bytes per node)."""
+    nodes = np.arange(first, last, dtype=np.int64)
+    start, end = int(offsets[first]), int(offsets[last])
+    degrees = np.diff(offsets[first : last + 1]).astype(np.int64)
+    chunk = targets[start:end].astype(np.int64)
+
+    gaps = np.empty(len(chunk), dtype=np.int64)
+    gaps[1:] = np.diff(chunk) - 1
+    heads = offsets[first:last][degrees > 0] - start  # first edge of every list
+    diff = chunk[heads] - nodes[degrees > 0]
+    gaps[heads] = (diff << 1) ^ (diff >> 63)  # zigzag
+
+    values = np.empty(len(nodes) + len(chunk), dtype=np.int64)
+    degree_pos = offsets[first:last] - start + np.arange(len(nodes))
+    values[degree_pos] = degrees
+    is_edge = np.ones(len(values), dtype=bool)
+    is_edge[degree_pos] = False
+    values[is_edge] = gaps
+    data, sizes = encode_varints(values)
+    return data, np.add.reduceat(sizes, degree_pos) if len(nodes) else sizes[:0]
+
+
+def _write_lists(f, offsets: np.ndarray, targets: np.ndarray, interval: int) -> np.ndarray:
+    """Stream every node's encoded list to f, returning the sparse index."""
+    num_nodes = len(offsets) - 1
+    index = [np.zeros(1, dtype=np.uint64)]
+    position = 0
+    chunk = NODE_CHUNK - NODE_CHUNK % interval  # chunks start on index entries
+    for first in range(0, num_nodes, chunk):
+        last = min(first + chunk, num_nodes)
+        data, node_bytes = _encode_lists(offsets, targets, first, last)
+        f.write(memoryview(data))
+        ends = position + np.cumsum(node_bytes)
+        position = int(ends[-1])
+        # byte offset after each full interval, plus the end of a partial last one
+        marks = ends[interval - 1 :: interval]
+        if (last - first) % interval:
+            marks = np.append(marks, ends[-1])
+        index.append(marks.astype(np.uint64))
+    return np.concatenate(index)
+
+
+def write_compressed(
+    path: str,
+    offsets: np.ndarray,
+    targets: np.ndarray,
+    title_offsets: np.ndarray,
+    title_data: np.ndarray,
+    reverse: tuple[np.ndarray, np.ndarray] | None = None,
+    interval: int = 64,
+):
+    """Write a compressed graph from CSR arrays (targets sorted per node)."""
+    lists = {"": (offsets, targets)}
+    if reverse is not None:
+        lists["rev_"] = reverse
+    table = [0] * (2 * len(SECTIONS))
+
+    def mark(name: str, start: int, end: int):
+        i = SECTIONS.index(name)
+        table[2 * i : 2 * i + 2] = [start, end - start]
+
+    with open(path, "w+b") as f:
+        f.write(b"\x00" * _HEADER.size)
+        for prefix, (list_offsets, list_targets) in lists.items():
+            start = f.tell()
+            index = _write_lists(f, list_offsets, list_targets, interval)
+            mark(prefix + "data", start, f.tell())
+            f.write(b"\x00" * (-f.tell() % 8))
+            start = f.tell()
+            f.write(memoryview(index).cast("B"))
+            mark(prefix + "index", start, f.tell())
+        for name, array in (
+            ("title_offsets", np.asarray(title_offsets, dtype=np.int64)),
+            ("title_data", np.asarray(title_data, dtype=np.uint8)),
+        ):
+            f.write(b"\x00" * (-f.tell() % 8))
+            start = f.tell()
+            f.write(memoryview(array).cast("B"))
+            mark(name, start, f.tell())
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, len(offsets) - 1, len(targets), interval, *table))
+
+
+def compress_csr(csr_path: str, output_path: str, interval: int = 64, reverse: bool = True):
+    """Convert a CSRGraph file to the compressed format."""
+    with CSRGraph(csr_path) as graph:
+        write_compressed(
+            output_path,
+            graph.offsets,
+            graph.targets,
+            graph._sections["title_offsets"],
+            graph._sections["title_data"],
+            graph.reverse if reverse else None,
+            interval,
+        )
+
+
+class _Lists:
+    """One direction's sparse index and varint data."""
+
+    def __init__(self, index: np.ndarray, data: np.ndarray, num_nodes: int, interval: int):
+        self.index = index
+        self.data = data
+        self.num_nodes = num_nodes
+        self.interval = interval
+
+    def neighbors(self, node: int) -> np.ndarray:
+        block, skip = divmod(node, self.interval)
+        values = decode_varints(self.data[int(self.index[block]) : int(self.index[block + 1])])
+        position = 0
+        for _ in range(skip):
+            position += 1 + int(values[position])
+        degree = int(values[position])
+        if not degree:
+            return np.empty(0, dtype=np.int32)
+        gaps = values[position + 1 : position + 1 + degree] + 1
+        first = int(gaps[0] - 1)
+        gaps[0] = node + ((first >> 1) ^ -(first & 1))
+        return np.cumsum(gaps).astype(np.int32)
+
+    def expand(self, frontier: np.ndarray) -> np.ndarray:
+        """All successors of the frontier nodes (with repeats), decoding each needed block once."""
+        frontier = np.asarray(frontier, dtype=np.int64)
+        if not len(frontier):
+            return np.empty(0, dtype=np.int32)
+        blocks = np.unique(frontier // self.interval)
+        starts = self.index[blocks].astype(np.int64)
+        lengths = self.index[blocks + 1].astype(np.int64) - starts
+        shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        data = self.data[np.arange(int(lengths.sum())) + shift]
+        values = decode_varints(data)
+
+        # walk all blocks in step, the k-th list of every block at once,
+        # starting from the value each block's first byte begins
+        ends = np.flatnonzero(data < 0x80)
+        position = np.searchsorted(ends, np.cumsum(lengths) - lengths)
+        list_start = np.empty((len(blocks), self.interval), dtype=np.int64)
+        list_degree = np.zeros((len(blocks), self.interval), dtype=np.int64)
+        limit = len(values)
+        for k in range(self.interval):
+            valid = blocks * self.interval + k < self.num_nodes
+            safe = np.minimum(position, limit - 1)
+            degree = np.where(valid, values[safe], 0)
+            list_start[:, k] = position + 1
+            list_degree[:, k] = degree
+            position = position + np.where(valid, 1 + degree, 0)
+
+        row = np.searchsorted(blocks, frontier // self.interval)
+        column = frontier % self.interval
+        starts, counts = list_start[row, column], list_degree[row, column]
+        keep = counts > 0
+        starts, counts, nodes = starts[keep], counts[keep], frontier[keep]
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.int32)
+        heads = np.cumsum(counts) - counts
+        gaps = values[np.arange(total) + np.repeat(starts - heads, counts)] + 1
+        first = gaps[heads] - 1
+        absolute = nodes + ((first >> 1) ^ -(first & 1))
+        gaps[heads] = absolute
+        sums = np.cumsum(gaps)
+        return (sums - np.repeat(sums[heads] - absolute, counts)).astype(np.int32)
+
+
+class CompressedGraph:
+    """
+    Read-only link graph in the compressed format, memory-mapped like
+    CSRGraph. neighbors() decodes one interval of the varint data, expand()
+    decodes every interval a BFS frontier touches in a few numpy passes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_nodes, self.num_edges, self.interval, *table = _HEADER.unpack_from(
+            self._mmap
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compressed graph file")
+        self._sections: dict[str, np.ndarray] = {}
+        for name, start, length in zip(SECTIONS, table[::2], table[1::2]):
+            dtype = np.dtype(_DTYPES[name])
+            self._sections[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=length // dtype.itemsize, offset=start
+            )
+        self._forward = _Lists(
+            self._sections["index"], self._sections["data"], self.num_nodes, self.interval
+        )
+        self._reverse = None
+        if len(self._sections["rev_index"]):
+            self._reverse = _Lists(
+                self._sections["rev_index"], self._sections["rev_data"], self.num_nodes, self.interval
+            )
+        self._title_ids: dict[str, int] | None = None
+
+    def neighbors(self, node: int) -> np.ndarray:
+        """Out-links of node."""
+        return self._forward.neighbors(node)
+
+    def predecessors(self, node: int) -> np.ndarray:
+        """Pages linking to node, if the file has the reverse lists."""
+        if self._reverse is None:
+            raise ValueError(f"{self.path} has no backlink lists")
+        return self._reverse.neighbors(node)
+
+    def expand(self, frontier: np.ndarray, reverse: bool = False) -> np.ndarray:
+        """Every out-link (or backlink) of the frontier nodes, with repeats."""
+        lists = self._forward
+        if reverse:
+            if self._reverse is None:
+                raise ValueError(f"{self.path} has no backlink lists")
+            lists = self._reverse
+        return lists.expand(frontier)
+
+    def distances(self, source: int) -> np.ndarray:
+        """BFS link distance from source to every node (-1 if unreachable)."""
+        dist = np.full(self.num_nodes, -1, dtype=np.int32)
+        dist[source] = 0
+        frontier = np.array([source], dtype=np.int32)
+        depth = 0
+        while frontier.size:
+            found = np.unique(self.expand(frontier))
+            frontier = found[dist[found] < 0]
+            depth += 1
+            dist[frontier] = depth
+        return dist
+
+    def title(self, node: int) -> str:
+        title_offsets = self._sections["title_offsets"]
+        data = self._sections["title_data"][title_offsets[node] : title_offsets[node + 1]]
+        return data.tobytes().decode("utf-8")
+
+    def find(self, title: str) -> int | None:
+        """Node id of title, or None. The lookup dict is built on first use."""
+        if self._title_ids is None:
+            self._title_ids = {self.title(v): v for v in range(self.num_nodes)}
+        return self._title_ids.get(title)
+
+    def close(self):
+        self._sections.clear()
+        self._forward = self._reverse = None  # release the views before unmapping
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # arrays handed out are still alive, the mapping goes with them
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress a CSR graph file into gap/varint lists.")
+    parser.add_argument("input", help="CSR graph file")
+    parser.add_argument("output", help="compressed graph file to write")
+    parser.add_argument("--interval", type=int, default=64, help="nodes per sparse index entry")
+    parser.add_argument("--no-reverse", action="store_true", help="leave out the backlink lists")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    compress_csr(args.input, args.output, args.interval, not args.no_reverse)
+    with CSRGraph(args.input) as G, CompressedGraph(args.output) as C:
+        csr_bytes = G.offsets.nbytes + G.targets.nbytes
+        print(
+            f"Compressed {C.num_nodes} nodes, {C.num_edges} edges in {time.time() - start_time:.2f} seconds: "
+            f"{C._sections['data'].nbytes / 1024**2:.1f} MB of lists "
+            f"({C._sections['data'].nbytes * 8 / max(C.num_edges, 1):.2f} bits/edge) "
+            f"vs {csr_bytes / 1024**2:.1f} MB CSR"
+        )
@@ -0,0 +1,283 @@
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from CSRGraph import HEADER_SIZE, SECTIONS, CSRGraph, pack_header
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LoadLinks"))
+from RecordFile import decodeTitleLinks, readRecords
+from RedirectTable import RedirectTable
+from TitleDictionary import TitleDictionary
+
+# Edges travel as uint64 sort keys, source << 32 | target (target << 32 |
+# source for the reverse index), so sorting the keys sorts the CSR rows.
+_KEY_BYTES = 8
+# bytes held per buffered edge while spilling: the int32 pair, forward and
+# reverse keys, and the de-duplicated copy in the sorting worker
+_SPILL_BYTES_PER_EDGE = 40
+_MAX_ID = 0xFFFFFFFF
+
+
+def edge_chunks_from_bin(edges_path: str, chunk_edges: int):
+    """Stream CompressedLoader's int32 (source, target) pairs in chunks."""
+    total = os.path.getsize(edges_path) // 8
+    for first in range(0, total, chunk_edges):
+        count = min(chunk_edges, total - first)
+        yield np.fromfile(edges_path, dtype=np.int32, count=2 * count, offset=8 * first).reshape(-1, 2)
+
+
+def edge_chunks_from_records(records_path: str, titles: TitleDictionary, chunk_edges: int):
+    """Stream a title-links RecordFile as id pairs, interning titles as they appear."""
+    sources, targets, buffered = [], [], 0
+    for record in readRecords(records_path):
+        page, links = decodeTitleLinks(record)
+        link_ids = titles.idsOf(links)
+        sources.append(np.full(len(link_ids), titles.getId(page), dtype=np.int32))
+        targets.append(link_ids)
+        buffered += len(link_ids)
+        if buffered >= chunk_edges:
+            yield np.column_stack((np.concatenate(sources), np.concatenate(targets)))
+            sources, targets, buffered = [], [], 0
+    if buffered:
+        yield np.column_stack((np.concatenate(sources), np.concatenate(targets)))
+
+
+def _resolve_chunk(edges: np.ndarray, canon: np.ndarray | None) -> np.ndarray:
+    """resolveEdges for one chunk, minus the de-duplication the merge does anyway.
+    Ids past the end of canon (titles first seen after it was built) are not redirects."""
+    if canon is None:
+        return edges
+    sources, targets = edges[:, 0], edges[:, 1].copy()
+    known = targets < len(canon)
+    targets[known] = canon[targets[known]]
+    keep = targets != sources
+    inside = sources < len(canon)
+    keep[inside] &= canon[sources[inside]] == sources[inside]
+    return np.column_stack((sources[keep], targets[keep]))
+
+
+def _sorted_unique(keys: np.ndarray) -> np.ndarray:
+    """np.unique for keys, sorting in place instead of hashing."""
+    keys.sort()
+    keep = np.empty(len(keys), dtype=bool)
+    keep[:1] = True
+    np.not_equal(keys[1:], keys[:-1], out=keep[1:])
+    return keys[keep]
+
+
+def _sort_run(path: str) -> int:
+    """Sort and de-duplicate the keys in one run file in place."""
+    keys = _sorted_unique(np.fromfile(path, dtype=np.uint64))
+    keys.tofile(path)
+    return len(keys)
+
+
+def merge_runs(run_paths: list[str], block_keys: int):
+    """
+    k-way merge of sorted, de-duplicated run files, yielding sorted unique
+    key arrays. Each round reads up to block_keys per run and emits every
+    buffered key no greater than the smallest last key of the runs that
+    still have data on disk, so at least one buffer empties per round.
+    """
+    files = [open(path, "rb") for path in run_paths]
+    try:
+        buffers = [np.empty(0, dtype=np.uint64) for _ in files]
+        exhausted = [False] * len(files)
+        last = None
+        while True:
+            for i, f in enumerate(files):
+                if not len(buffers[i]) and not exhausted[i]:
+                    buffers[i] = np.fromfile(f, dtype=np.uint64, count=block_keys)
+                    exhausted[i] = len(buffers[i]) < block_keys
+            pending = [int(b[-1]) for b, done in zip(buffers, exhausted) if len(b) and not done]
+            if not pending and not any(len(b) for b in buffers):
+                return
+            bound = min(pending) if pending else None
+            parts = []
+            for i, b in enumerate(buffers):
+                cut = len(b) if bound is None else int(np.searchsorted(b, bound, side="right"))
+                parts.append(b[:cut])
+                buffers[i] = b[cut:]
+            merged = _sorted_unique(np.concatenate(parts))
+            if last is not None and len(merged) and merged[0] == last:
+                merged = merged[1:]
+            if len(merged):
+                last = merged[-1]
+                yield merged
+    finally:
+        for f in files:
+            f.close()
+
+
+class ExternalCSRBuilder:
+    """
+    Builds a CSRGraph file from an edge stream larger than memory. Chunks
+    of edges are spilled as forward and reverse key runs, a pool sorts the
+    runs in parallel while the next chunk is read, and a k-way merge of the
+    runs streams the targets (then the backlink sources) straight into the
+    output file while counting degrees for the offsets.
+
+    memory_limit caps the edge buffers of both phases; the per-node arrays
+    (degree counts, titles) come on top of it.
+    """
+
+    def __init__(
+        self,
+        memory_limit: int = 1 << 30,
+        workers: int | None = None,
+        tmp_dir: str | None = None,
+        reverse: bool = True,
+    ):
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self.memory_limit = memory_limit
+        # edges per spilled run: one chunk being read plus one per sorting worker
+        self.chunk_edges = max(memory_limit // (_SPILL_BYTES_PER_EDGE * (self.workers + 1)), 1024)
+
+        self.tmp_dir = tmp_dir
+        self.reverse = reverse
+        self.runs: dict[str, list[str]] = {"forward": [], "reverse": []}
+
+    def spill(self, chunks, canon: np.ndarray | None, run_dir: str):
+        """Write every chunk as sorted runs, sorting up to workers runs at once."""
+        pending = []
+        with mp.Pool(self.workers) as pool:
+            for edges in chunks:
+                edges = _resolve_chunk(np.asarray(edges, dtype=np.int64), canon)
+                if not len(edges):
+                    continue
+                sources, targets = edges[:, 0].astype(np.uint64), edges[:, 1].astype(np.uint64)
+                for direction in ("forward", "reverse") if self.reverse else ("forward",):
+                    high, low = (sources, targets) if direction == "forward" else (targets, sources)
+                    path = os.path.join(run_dir, f"{direction}-{len(self.runs[direction]):05d}.run")
+                    ((high << np.uint64(32)) | low).tofile(path)
+                    self.runs[direction].append(path)
+                    pending.append(pool.apply_async(_sort_run, (path,)))
+                while len(pending) > 2 * self.workers:
+                    pending.pop(0).get()  # keeps the unsorted runs on disk bounded
+            for result in pending:
+                result.get()
+
+    def _merge_into(self, f, direction: str, num_nodes: int) -> np.ndarray:
+        """Stream one direction's merged column into f, returning its offsets."""
+        block_keys = max(self.memory_limit // (3 * _KEY_BYTES * max(len(self.runs[direction]), 1)), 1024)
+        counts = np.zeros(num_nodes, dtype=np.int64)
+        for keys in merge_runs(self.runs[direction], block_keys):
+            # keys are sorted, so a block only touches the nodes from its first source to its last
+            sources = (keys >> np.uint64(32)).astype(np.int64)
+            first = int(sources[0])
+            block_counts = np.bincount(sources - first)
+            counts[first : first + len(block_counts)] += block_counts
+            f.write(memoryview((keys & np.uint64(_MAX_ID)).astype(np.int32)).cast("B"))
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return offsets
+
+    def build(self, chunks, titles: TitleDictionary, output_path: str, canon: np.ndarray | None = None):
+        """
+        Spill chunks (int32 (source, target) arrays, ids into titles), merge
+        and write the CSR file. titles may keep growing while chunks stream.
+        """
+        with tempfile.TemporaryDirectory(dir=self.tmp_dir, prefix="csr-runs-") as run_dir:
+            self.runs = {"forward": [], "reverse": []}
+            self.spill(chunks, canon, run_dir)
+            num_nodes = len(titles)
+            title_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+            np.cumsum(
+                np.fromiter((len(t.encode("utf-8")) for t in titles.titles), np.int64, num_nodes),
+                out=title_offsets[1:],
+            )
+
+            table = [0] * (2 * len(SECTIONS))
+
+            def section(name: str, f, write):
+                f.write(b"\x00" * (-f.tell() % 8))
+                start = f.tell()
+                result = write()
+                i = SECTIONS.index(name)
+                table[2 * i : 2 * i + 2] = [start, f.tell() - start]
+                return start, result
+
+            with open(output_path, "w+b") as f:
+                f.write(b"\x00" * HEADER_SIZE)
+                # the offsets are only known after the merge, leave room for them
+                offsets_start, _ = section("offsets", f, lambda: f.write(b"\x00" * 8 * (num_nodes + 1)))
+                _, offsets = section("targets", f, lambda: self._merge_into(f, "forward", num_nodes))
+                section("title_offsets", f, lambda: f.write(memoryview(title_offsets).cast("B")))
+                section("title_data", f, lambda: f.writelines(t.encode("utf-8") for t in titles.titles))
+                if self.reverse:
+                    rev_start, _ = section(
+                        "rev_offsets", f, lambda: f.write(b"\x00" * 8 * (num_nodes + 1))
+                    )
+                    _, rev_offsets = section(
+                        "rev_sources", f, lambda: self._merge_into(f, "reverse", num_nodes)
+                    )
+                    f.seek(rev_start)
+                    f.write(memoryview(rev_offsets).cast("B"))
+                f.seek(offsets_start)
+                f.write(memoryview(offsets).cast("B"))
+                f.seek(0)
+                f.write(pack_header(num_nodes, int(offsets[-1]), table))
+
+
+def build_from_edges(
+    edges_path: str,
+    titles_path: str,
+    output_path: str,
+    redirects_path: str | None = None,
+    builder: ExternalCSRBuilder | None = None,
+):
+    """Out-of-core convert_edges: enwiki_edges.bin + enwiki_titles.txt."""
+    builder = builder or ExternalCSRBuilder()
+    titles = TitleDictionary.load(titles_path)
+    canon = RedirectTable.load(redirects_path).canonical(len(titles)) if redirects_path else None
+    builder.build(edge_chunks_from_bin(edges_path, builder.chunk_edges), titles, output_path, canon)
+
+
+def build_from_records(
+    records_path: str,
+    output_path: str,
+    redirects_path: str | None = None,
+    builder: ExternalCSRBuilder | None = None,
+):
+    """Out-of-core convert_records: a title-links RecordFile (.rec)."""
+    builder = builder or ExternalCSRBuilder()
+    titles = TitleDictionary()
+    canon = None
+    if redirects_path:
+        canon = RedirectTable.fromTsv(redirects_path, titles).canonical(len(titles))
+    chunks = edge_chunks_from_records(records_path, titles, builder.chunk_edges)
+    builder.build(chunks, titles, output_path, canon)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build a CSR graph file with an external sort, under a memory cap."
+    )
+    parser.add_argument("input", help="enwiki_edges.bin (with --titles) or a .rec file")
+    parser.add_argument("output", help="CSR graph file to write")
+    parser.add_argument("--titles", help="titles file, for .bin edge input")
+    parser.add_argument("--redirects", help="redirects file (.bin for edges, .tsv for records)")
+    parser.add_argument("--memory", type=float, default=1.0, help="edge buffer cap in GB")
+    parser.add_argument("--workers", type=int, help="processes sorting runs")
+    parser.add_argument("--tmp-dir", help="where to spill the runs (default: system temp)")
+    parser.add_argument("--no-reverse", action="store_true", help="leave out the backlink index")
+    args = parser.parse_args()
+
+    builder = ExternalCSRBuilder(
+        int(args.memory * 1024**3), args.workers, args.tmp_dir, not args.no_reverse
+    )
+    start_time = time.time()
+    if args.input.endswith(".bin"):
+        build_from_edges(args.input, args.titles, args.output, args.redirects, builder)
+    else:
+        build_from_records(args.input, args.output, args.redirects, builder)
+    with CSRGraph(args.output) as G:
+        print(
+            f"Wrote {args.output} ({G.num_nodes} nodes, {G.num_edges} edges) from "
+            f"{len(builder.runs['forward'])} runs in {time.time() - start_time:.2f} seconds"
+        )
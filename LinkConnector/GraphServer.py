@@ -0,0 +1,280 @@
+import argparse
+import collections
+import json
+import queue
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from CSRGraph import CSRGraph
+from PathFinder import PathFinder, expand
+
+MAX_DEPTH = 6  # deepest neighbors/backlinks query; six hops cover most of the graph
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with hit/miss counters. Holds at
+    most max_size worth of values, each weighing weigh(value) (by default
+    1, i.e. max_size entries).
+    """
+
+    def __init__(self, max_size: int, weigh=lambda value: 1):
+        self.max_size = max_size
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._items:
+                self.weight -= self.weigh(self._items[key])
+            self._items[key] = value
+            self._items.move_to_end(key)
+            self.weight += self.weigh(value)
+            while self.weight > self.max_size:
+                _, evicted = self._items.popitem(last=False)
+                self.weight -= self.weigh(evicted)
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "weight": self.weight, "hits": self.hits, "misses": self.misses}
+
+
+class LatencyStats:
+    """Per-endpoint request counts and p50/p99 latency over a recent window."""
+
+    def __init__(self, window: int = 10000):
+        self.started = time.time()
+        self._latencies: dict[str, collections.deque] = collections.defaultdict(
+            lambda: collections.deque(maxlen=window)
+        )
+        self._counts: collections.Counter = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+            self._counts[endpoint] += 1
+
+    def report(self) -> dict:
+        uptime = time.time() - self.started
+        with self._lock:
+            endpoints = {}
+            for endpoint, latencies in self._latencies.items():
+                p50, p99 = np.percentile(np.fromiter(latencies, float), [50, 99]) * 1000
+                endpoints[endpoint] = {
+                    "count": self._counts[endpoint],
+                    "p50_ms": round(p50, 3),
+                    "p99_ms": round(p99, 3),
+                }
+            total = sum(self._counts.values())
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": total,
+            "requests_per_s": round(total / uptime, 2) if uptime else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+class GraphService:
+    """The queries the server answers, over one graph shared by every thread."""
+
+    def __init__(
+        self, graph: CSRGraph, path_cache_size: int = 10000, frontier_cache_bytes: int = 256 * 1024**2
+    ):
+        self.graph = graph
+        self.path_cache = LRUCache(path_cache_size)
+        # a hub's deeper frontiers can be much of the graph, so weigh them by size
+        self.frontier_cache = LRUCache(
+            frontier_cache_bytes, lambda result: result[0].nbytes + result[1].nbytes
+        )
+        self.latency = LatencyStats()
+        self._finders: queue.SimpleQueue = queue.SimpleQueue()  # idle PathFinders
+        graph.find("")  # build the title lookup and backlink index before serving
+        graph.reverse
+
+    def _node(self, title: str) -> int:
+        node = self.graph.find(title)
+        if node is None:
+            raise KeyError(title)
+        return node
+
+    def path(self, source: str, target: str, k: int = 1) -> list[list[str]]:
+        key = (source, target, k)
+        paths = self.path_cache.get(key)
+        if paths is None:
+            # the server starts a thread per request, so PathFinders (and their
+            # visited arrays) are pooled and reused rather than kept per thread
+            try:
+                finder = self._finders.get_nowait()
+            except queue.Empty:
+                finder = PathFinder(self.graph)
+            try:
+                paths = finder.shortest_title_paths(source, target, k)
+            finally:
+                self._finders.put(finder)
+            self.path_cache.put(key, paths)
+        return paths
+
+    def _frontier(self, node: int, direction: str, depth: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (visited, frontier) of a BFS from node after depth steps, both
+        sorted. Continues from the deepest cached step, caching every step
+        it takes. Raises ValueError unless 0 <= depth <= MAX_DEPTH.
+        """
+        if not 0 <= depth <= MAX_DEPTH:
+            raise ValueError(f"depth must be between 0 and {MAX_DEPTH}, not {depth}")
+        step, result = depth, None
+        while step >= 0 and result is None:
+            result = self.frontier_cache.get((node, direction, step))
+            step -= 1
+        if result is None:
+            result = (np.array([node], dtype=np.int32), np.array([node], dtype=np.int32))
+            self.frontier_cache.put((node, direction, 0), result)
+        if direction == "out":
+            offsets, adjacency = self.graph.offsets, self.graph.targets
+        else:
+            offsets, adjacency = self.graph.reverse
+        for step in range(step + 2, depth + 1):
+            visited, frontier = result
+            found = np.unique(expand(offsets, adjacency, frontier))
+            frontier = np.setdiff1d(found, visited, assume_unique=True)
+            result = (np.union1d(visited, frontier), frontier)
+            self.frontier_cache.put((node, direction, step), result)
+        return result
+
+    def neighbors(self, title: str, depth: int = 1) -> list[str]:
+        """Titles exactly depth links away from title."""
+        _, frontier = self._frontier(self._node(title), "out", depth)
+        return [self.graph.title(v) for v in frontier.tolist()]
+
+    def backlinks(self, title: str, depth: int = 1) -> list[str]:
+        """Titles exactly depth backlinks away from title."""
+        _, frontier = self._frontier(self._node(title), "in", depth)
+        return [self.graph.title(v) for v in frontier.tolist()]
+
+    def degree(self, title: str) -> dict:
+        node = self._node(title)
+        rev_offsets, _ = self.graph.reverse
+        return {
+            "out": int(self.graph.offsets[node + 1] - self.graph.offsets[node]),
+            "in": int(rev_offsets[node + 1] - rev_offsets[node]),
+        }
+
+    def stats(self) -> dict:
+        return {
+            **self.latency.report(),
+            "path_cache": self.path_cache.stats(),
+            "frontier_cache": self.frontier_cache.stats(),
+            "nodes": self.graph.num_nodes,
+            "edges": self.graph.num_edges,
+        }
+
+
+class GraphRequestHandler(BaseHTTPRequestHandler):
+    service: GraphService
+
+    def do_GET(self):
+        start_time = time.perf_counter()
+        url = urllib.parse.urlparse(self.path)
+        endpoint = url.path.strip("/")
+        params = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+        try:
+            if endpoint == "path":
+                body = self.service.path(params["source"], params["target"], int(params.get("k", 1)))
+            elif endpoint in ("neighbors", "backlinks"):
+                body = getattr(self.service, endpoint)(params["title"], int(params.get("depth", 1)))
+            elif endpoint == "degree":
+                body = self.service.degree(params["title"])
+            elif endpoint == "stats":
+                body = self.service.stats()
+            else:
+                self._send(404, {"error": f"unknown endpoint {endpoint!r}"})
+                return
+            self._send(200, body)
+        except KeyError as e:
+            self._send(404, {"error": f"unknown title or missing parameter {e}"})
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+        finally:
+            if endpoint != "stats":
+                self.service.latency.record(endpoint, time.perf_counter() - start_time)
+
+    def _send(self, status: int, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # /stats reports on requests instead
+
+
+def serve(graph_path: str, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Load the graph once and return a server ready for serve_forever()."""
+    handler = type("Handler", (GraphRequestHandler,), {"service": GraphService(CSRGraph(graph_path))})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+class GraphClient:
+    """Small client for notebooks and scripts talking to a running GraphServer."""
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8765"):
+        self.base_url = base_url.rstrip("/")
+
+    def _get(self, endpoint: str, **params):
+        url = f"{self.base_url}/{endpoint}?{urllib.parse.urlencode(params)}"
+        with urllib.request.urlopen(url) as response:
+            return json.load(response)
+
+    def path(self, source: str, target: str, k: int = 1) -> list[list[str]]:
+        return self._get("path", source=source, target=target, k=k)
+
+    def neighbors(self, title: str, depth: int = 1) -> list[str]:
+        return self._get("neighbors", title=title, depth=depth)
+
+    def backlinks(self, title: str, depth: int = 1) -> list[str]:
+        return self._get("backlinks", title=title, depth=depth)
+
+    def degree(self, title: str) -> dict:
+        return self._get("degree", title=title)
+
+    def stats(self) -> dict:
+        return self._get("stats")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve link graph queries over localhost HTTP.")
+    parser.add_argument("--graph", default="wikipedia_graph.csr", help="CSR graph file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    start_time = time.time()
+    server = serve(args.graph, args.host, args.port)
+    print(
+        f"Graph loaded in {time.time() - start_time:.2f} seconds, serving on http://{args.host}:{args.port}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
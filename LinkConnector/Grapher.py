@@ -1,19 +1,75 @@
 import networkx as nx
+import numpy as np
 
 # import plotly.graph_objects as go
 import pickle
 import gzip
 import os
+import sys
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LoadLinks"))
+from RecordFile import decodeTitleLinks, readRecords
+from RedirectTable import RedirectTable, resolveEdges
+from TitleDictionary import TitleDictionary, normalizeTitle
+
+
+def load_redirect_targets(redirects_path: str) -> dict[str, str]:
+    """Map every redirect title (from a redirects .tsv) to the page its chain ends at."""
+    titles = TitleDictionary()
+    table = RedirectTable.fromTsv(redirects_path, titles)
+    canon = table.canonical(len(titles))
+    return {
+        titles.titles[source]: titles.titles[canon[source]]
+        for source in table.sources
+    }
+
+
+def iter_title_links(links_path: str):
+    """
+    Yield (page, links) from a RecordFile (.rec), streamed from disk, or
+    from a pickled list.
+    """
+    if links_path.endswith(".rec"):
+        for record in readRecords(links_path):
+            yield decodeTitleLinks(record)
+    else:
+        with open(links_path, "rb") as f:
+            yield from pickle.load(f)
+
 
-def create_graph(pickle_path: str) -> nx.DiGraph:
+def create_graph(links_path: str, redirects_path: str | None = None) -> nx.DiGraph:
+    redirects = load_redirect_targets(redirects_path) if redirects_path else {}
     G = nx.DiGraph()  # directed graph (Page -> Links)
-    with open(pickle_path, "rb") as f:
-        links_list = pickle.load(f)
-        for page, links in links_list:
-            for link in links:
-                G.add_edge(page, link)
+    for page, links in iter_title_links(links_path):
+        for link in links:
+            if redirects:
+                link = redirects.get(normalizeTitle(link), link)
+            G.add_edge(page, link)
+    return G
+
+
+def create_graph_from_edges(
+    edges_path: str, titles_path: str, redirects_path: str | None = None
+) -> nx.DiGraph:
+    """
+    Build the graph from CompressedLoader's interned output: int32 (source,
+    target) pairs plus a titles file whose line numbers are the node ids.
+    With a redirects file, link targets are rewritten to the page their
+    redirect chain ends at and redirect pages are left out of the graph.
+    Nodes are ints, the titles list is kept in G.graph["titles"].
+    """
+    edges = np.fromfile(edges_path, dtype=np.int32).reshape(-1, 2)
+    with open(titles_path, encoding="utf-8") as f:
+        titles = f.read().splitlines()
+    nodes = np.arange(len(titles))
+    if redirects_path:
+        canon = RedirectTable.load(redirects_path).canonical(len(titles))
+        edges = resolveEdges(edges, canon)
+        nodes = nodes[canon == nodes]
+    G = nx.DiGraph(titles=titles)
+    G.add_nodes_from(nodes.tolist())
+    G.add_edges_from(edges.tolist())
     return G
 
 
@@ -102,7 +158,7 @@ def visualize_graph(G: nx.DiGraph, max_nodes=100):
 
 
 def load_and_save(load_graph, output_path):
-    input_path = "enwiki_links_list.pkl"
+    input_path = "enwiki_links.rec"
     # Encapsulated in function so G is not kept in memory
     print("Generating graph...")
     G = load_graph(input_path)
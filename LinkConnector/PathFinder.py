@@ -0,0 +1,152 @@
+import argparse
+import itertools
+import time
+from typing import Iterator
+
+import numpy as np
+
+from CSRGraph import CSRGraph
+
+
+def expand(offsets: np.ndarray, adjacency: np.ndarray, frontier: np.ndarray) -> np.ndarray:
+    """All neighbors of the frontier nodes (with repeats), gathered in one go."""
+    starts = offsets[frontier]
+    counts = offsets[frontier + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, dtype=adjacency.dtype)
+    shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return adjacency[np.arange(total) + shift]
+
+
+class PathFinder:
+    """
+    Shortest link paths over a CSRGraph using frontier-at-a-time
+    bidirectional BFS: forward over links, backward over backlinks, always
+    growing the cheaper side. Visited sets are int32 distance arrays that are
+    allocated once and reset after every query.
+    """
+
+    def __init__(self, graph: CSRGraph):
+        self.graph = graph
+        self.offsets, self.targets = graph.offsets, graph.targets
+        self.rev_offsets, self.rev_sources = graph.reverse
+        self._dist_fwd = np.full(graph.num_nodes, -1, dtype=np.int32)
+        self._dist_bwd = np.full(graph.num_nodes, -1, dtype=np.int32)
+
+    def _search(self, source: int, target: int) -> np.ndarray:
+        """
+        Run the BFS, leaving distances in the dist arrays. Returns the nodes
+        every shortest path passes through at one fixed position, or an empty
+        array if target is unreachable.
+        """
+        dist_fwd, dist_bwd = self._dist_fwd, self._dist_bwd
+        dist_fwd[source] = 0
+        dist_bwd[target] = 0
+        frontier_fwd = np.array([source], dtype=np.int32)
+        frontier_bwd = np.array([target], dtype=np.int32)
+        depth_fwd = depth_bwd = 0
+        self._touched = [frontier_fwd, frontier_bwd]
+
+        while frontier_fwd.size and frontier_bwd.size:
+            cost_fwd = int((self.offsets[frontier_fwd + 1] - self.offsets[frontier_fwd]).sum())
+            cost_bwd = int(
+                (self.rev_offsets[frontier_bwd + 1] - self.rev_offsets[frontier_bwd]).sum()
+            )
+            if cost_fwd <= cost_bwd:
+                found = np.unique(expand(self.offsets, self.targets, frontier_fwd))
+                frontier_fwd = found[dist_fwd[found] < 0]
+                depth_fwd += 1
+                dist_fwd[frontier_fwd] = depth_fwd
+                new, other = frontier_fwd, dist_bwd
+            else:
+                found = np.unique(expand(self.rev_offsets, self.rev_sources, frontier_bwd))
+                frontier_bwd = found[dist_bwd[found] < 0]
+                depth_bwd += 1
+                dist_bwd[frontier_bwd] = depth_bwd
+                new, other = frontier_bwd, dist_fwd
+            self._touched.append(new)
+
+            meet = new[other[new] >= 0]
+            if meet.size:
+                closest = other[meet].min()
+                return meet[other[meet] == closest]
+        return np.empty(0, dtype=np.int32)
+
+    def _reset(self):
+        for nodes in self._touched:
+            self._dist_fwd[nodes] = -1
+            self._dist_bwd[nodes] = -1
+
+    def _halves(
+        self, node: int, dist: np.ndarray, offsets: np.ndarray, adjacency: np.ndarray
+    ) -> Iterator[list[int]]:
+        """Paths from node down the distance gradient to the BFS root."""
+        if dist[node] == 0:
+            yield [node]
+            return
+        neighbors = adjacency[offsets[node] : offsets[node + 1]]
+        for step in neighbors[dist[neighbors] == dist[node] - 1]:
+            for rest in self._halves(int(step), dist, offsets, adjacency):
+                rest.append(node)
+                yield rest
+
+    def shortest_paths(self, source: int, target: int, k: int | None = 1) -> list[list[int]]:
+        """
+        Return up to k shortest paths from source to target as lists of node
+        ids (all of them if k is None), or [] if there is no path.
+        """
+        if source == target:
+            return [[source]]
+        meeting = self._search(source, target)
+        try:
+            paths = (
+                head + tail[::-1][1:]
+                for node in meeting.tolist()
+                for head in self._halves(node, self._dist_fwd, self.rev_offsets, self.rev_sources)
+                for tail in self._halves(node, self._dist_bwd, self.offsets, self.targets)
+            )
+            return list(itertools.islice(paths, k))
+        finally:
+            self._reset()
+
+    def shortest_title_paths(
+        self, source: str, target: str, k: int | None = 1
+    ) -> list[list[str]]:
+        """shortest_paths by title, raising KeyError for unknown titles."""
+        ids = []
+        for title in (source, target):
+            node = self.graph.find(title)
+            if node is None:
+                raise KeyError(title)
+            ids.append(node)
+        return [
+            [self.graph.title(node) for node in path]
+            for path in self.shortest_paths(*ids, k)
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find shortest link paths between two articles.")
+    parser.add_argument("source", help="title of the starting article")
+    parser.add_argument("target", help="title of the article to reach")
+    parser.add_argument("--graph", default="wikipedia_graph.csr", help="CSR graph file")
+    parser.add_argument("-k", type=int, default=1, help="number of paths to print")
+    parser.add_argument("--all", action="store_true", help="print every shortest path")
+    args = parser.parse_args()
+
+    with CSRGraph(args.graph) as G:
+        finder = PathFinder(G)
+        G.find(args.source)  # build the title lookup outside the timing
+        start_time = time.perf_counter()
+        paths = finder.shortest_title_paths(
+            args.source, args.target, None if args.all else args.k
+        )
+        elapsed = (time.perf_counter() - start_time) * 1000
+        for path in paths:
+            print(" -> ".join(path))
+        if paths:
+            print(f"{len(paths)} path(s) of {len(paths[0]) - 1} links in {elapsed:.2f} ms")
+        else:
+            print(f"No path found in {elapsed:.2f} ms")
+        del finder, paths
@@ -0,0 +1,133 @@
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+
+from CSRGraph import CSRGraph
+from PathFinder import expand
+
+DIRECTIONS = ("out", "in", "both")
+
+
+def _neighbors(graph: CSRGraph, frontier: np.ndarray, direction: str) -> np.ndarray:
+    found = []
+    if direction in ("out", "both"):
+        found.append(expand(graph.offsets, graph.targets, frontier))
+    if direction in ("in", "both"):
+        found.append(expand(*graph.reverse, frontier))
+    return np.concatenate(found)
+
+
+def degree_scores(graph: CSRGraph, nodes: np.ndarray) -> np.ndarray:
+    """In- plus out-degree of nodes, the default pruning score."""
+    rev_offsets = graph.reverse[0]
+    return (
+        graph.offsets[nodes + 1] - graph.offsets[nodes] + rev_offsets[nodes + 1] - rev_offsets[nodes]
+    ).astype(np.float64)
+
+
+def k_hop_nodes(
+    graph: CSRGraph,
+    seeds: np.ndarray,
+    k: int = 1,
+    direction: str = "both",
+    max_nodes: int | None = 200,
+    scores: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Nodes within k hops of the seeds and their hop distance, as (nodes,
+    hops). Hops are taken one frontier at a time; once a hop would go past
+    max_nodes, only its highest-scoring new nodes that still fit are kept
+    and the search stops, so nearer nodes always win over farther ones.
+    scores is indexed by node id (e.g. saved PageRank); by default nodes
+    are ranked by degree.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {DIRECTIONS}, not {direction!r}")
+    nodes = np.unique(np.asarray(seeds, dtype=np.int64))
+    selected, hops = [nodes], [np.zeros(len(nodes), dtype=np.int32)]
+    frontier, total = nodes, len(nodes)
+    for hop in range(1, k + 1):
+        if not frontier.size or (max_nodes is not None and total >= max_nodes):
+            break
+        found = np.sort(_neighbors(graph, frontier, direction))  # sorting beats np.unique on hub frontiers
+        found = found[np.r_[True, found[1:] != found[:-1]]] if found.size else found
+        found = found[~np.isin(found, np.concatenate(selected))]
+        full = max_nodes is not None and total + len(found) > max_nodes
+        if full:
+            ranking = degree_scores(graph, found) if scores is None else np.asarray(scores[found])
+            found = np.sort(found[np.argsort(-ranking, kind="stable")[: max_nodes - total]])
+        selected.append(found)
+        hops.append(np.full(len(found), hop, dtype=np.int32))
+        frontier, total = found, total + len(found)
+        if full:
+            break
+    return np.concatenate(selected), np.concatenate(hops)
+
+
+def induced_edges(graph: CSRGraph, nodes: np.ndarray) -> np.ndarray:
+    """(source, target) rows of every link between two of nodes."""
+    order = np.sort(nodes)
+    targets = expand(graph.offsets, graph.targets, order)
+    sources = np.repeat(order, graph.offsets[order + 1] - graph.offsets[order])
+    position = np.minimum(np.searchsorted(order, targets), len(order) - 1)
+    keep = order[position] == targets
+    return np.column_stack((sources[keep], targets[keep]))
+
+
+def k_hop_subgraph(
+    graph: CSRGraph,
+    seed_titles: list[str],
+    k: int = 1,
+    direction: str = "both",
+    max_nodes: int | None = 200,
+    scores: np.ndarray | None = None,
+) -> nx.DiGraph:
+    """
+    The k-hop neighborhood of the seed titles as a small nx.DiGraph with
+    title nodes, ready for networkx drawing and analysis. Every node has
+    its node id, hop distance and pruning score as attributes; see
+    k_hop_nodes for the pruning. Graph attributes are scalars so the
+    result can be written with nx.write_graphml; the seed titles are
+    joined by "|". Raises KeyError for an unknown title.
+    """
+    seeds = []
+    for title in seed_titles:
+        node = graph.find(title)
+        if node is None:
+            raise KeyError(title)
+        seeds.append(node)
+    nodes, hops = k_hop_nodes(graph, np.array(seeds), k, direction, max_nodes, scores)
+    node_scores = degree_scores(graph, nodes) if scores is None else np.asarray(scores[nodes])
+    titles = {v: graph.title(v) for v in nodes.tolist()}
+
+    G = nx.DiGraph(seeds="|".join(titles[v] for v in seeds), k=k, direction=direction)
+    for v, hop, score in zip(nodes.tolist(), hops.tolist(), node_scores.tolist()):
+        G.add_node(titles[v], id=v, hop=hop, score=score)
+    G.add_edges_from((titles[u], titles[v]) for u, v in induced_edges(graph, nodes).tolist())
+    return G
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract the k-hop neighborhood of some articles.")
+    parser.add_argument("titles", nargs="+", help="seed article titles")
+    parser.add_argument("--graph", default="wikipedia_graph.csr", help="CSR graph file")
+    parser.add_argument("-k", type=int, default=1, help="hops to take")
+    parser.add_argument("--direction", choices=DIRECTIONS, default="both", help="follow links, backlinks or both")
+    parser.add_argument("--max-nodes", type=int, default=200, help="node budget (0 for no limit)")
+    parser.add_argument("--scores", default=None, help=".npy scores to prune by (e.g. PageRank from Centrality.py)")
+    parser.add_argument("--output", default=None, help=".graphml file to write the subgraph to")
+    args = parser.parse_args()
+
+    with CSRGraph(args.graph) as G:
+        scores = np.load(args.scores, mmap_mode="r") if args.scores else None
+        G.reverse
+        start_time = time.perf_counter()
+        S = k_hop_subgraph(G, args.titles, args.k, args.direction, args.max_nodes or None, scores)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        print(f"{S.number_of_nodes()} nodes, {S.number_of_edges()} edges in {elapsed:.2f} ms")
+        for title, data in sorted(S.nodes(data=True), key=lambda item: (item[1]["hop"], -item[1]["score"]))[:20]:
+            print(f"  {data['hop']}  {title}  ({data['score']:.6g})")
+        if args.output:
+            nx.write_graphml(S, args.output)
@@ -0,0 +1,341 @@
+import argparse
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LoadLinks"))
+from TitleDictionary import normalizeTitle
+
+# Titles are sorted and front-coded in buckets of bucket_size: the first
+# title of a bucket is stored whole (varint length + utf-8), every other one
+# as varint common-prefix length with its predecessor, varint suffix length
+# and the suffix. Node ids and sorted ranks map to each other through two
+# int32 arrays. Lookups go through sorted 64-bit hashes of the exact titles
+# and of their case-folded forms; a hash hit is checked against the decoded
+# title before it is returned.
+# File layout like CSRGraph: magic, num_titles, bucket_size, the
+# header_digest of the CSR file the table was built for, one (start,
+# length) u64 pair per section, then the 8-byte aligned sections.
+MAGIC = b"WLTTL\x00\x00\x02"
+SECTIONS = (
+    "bucket_offsets",  # uint64[num_buckets + 1] into buckets
+    "buckets",  # front-coded titles in sorted order
+    "rank_ids",  # int32[num_titles], node id of each sorted rank
+    "id_ranks",  # int32[num_titles], sorted rank of each node id
+    "hashes",  # uint64[num_titles], sorted exact-title hashes
+    "hash_ranks",  # int32[num_titles], rank of each hash
+    "fold_hashes",  # uint64[num_titles], sorted case-folded hashes
+    "fold_ranks",  # int32[num_titles]
+)
+_HEADER = struct.Struct("<8sQQ8s" + "QQ" * len(SECTIONS))
+_DTYPES = {
+    "bucket_offsets": np.uint64,
+    "buckets": np.uint8,
+    "rank_ids": np.int32,
+    "id_ranks": np.int32,
+    "hashes": np.uint64,
+    "hash_ranks": np.int32,
+    "fold_hashes": np.uint64,
+    "fold_ranks": np.int32,
+}
+
+
+def title_hash(title: str) -> int:
+    return int.from_bytes(hashlib.blake2b(title.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def header_digest(header: bytes) -> bytes:
+    """8-byte checksum of a CSR file header, tying a title table to its graph."""
+    return hashlib.blake2b(header, digest_size=8).digest()
+
+
+def fold_title(title: str) -> str:
+    """The case-insensitive key of a title: normalized, then case-folded."""
+    return normalizeTitle(title).casefold()
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _hash_index(keys: list[str], ranks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted hashes of keys and the ranks of the titles they came from."""
+    hashes = np.fromiter((title_hash(k) for k in keys), dtype=np.uint64, count=len(keys))
+    order = np.argsort(hashes, kind="stable")
+    return hashes[order], ranks[order].astype(np.int32)
+
+
+def write_title_table(
+    path: str, titles: list[str], bucket_size: int = 16, graph_digest: bytes = bytes(8)
+):
+    """
+    Write a title table for titles, whose list positions are the node ids.
+    graph_digest is the header_digest of the graph the titles belong to.
+    """
+    encoded = [t.encode("utf-8") for t in titles]
+    rank_ids = np.array(sorted(range(len(titles)), key=encoded.__getitem__), dtype=np.int32)
+    id_ranks = np.empty(len(titles), dtype=np.int32)
+    id_ranks[rank_ids] = np.arange(len(titles), dtype=np.int32)
+
+    buckets = bytearray()
+    bucket_offsets = []
+    previous = b""
+    for rank, node in enumerate(rank_ids.tolist()):
+        title = encoded[node]
+        if rank % bucket_size == 0:
+            bucket_offsets.append(len(buckets))
+            buckets += _varint(len(title))
+            buckets += title
+        else:
+            shared = _common_prefix(previous, title)
+            buckets += _varint(shared)
+            buckets += _varint(len(title) - shared)
+            buckets += title[shared:]
+        previous = title
+    bucket_offsets.append(len(buckets))
+
+    sections = {
+        "bucket_offsets": np.array(bucket_offsets, dtype=np.uint64),
+        "buckets": bytes(buckets),
+        "rank_ids": rank_ids,
+        "id_ranks": id_ranks,
+    }
+    sections["hashes"], sections["hash_ranks"] = _hash_index(titles, id_ranks)
+    sections["fold_hashes"], sections["fold_ranks"] = _hash_index(
+        [fold_title(t) for t in titles], id_ranks
+    )
+
+    table = []
+    position = _HEADER.size
+    for name in SECTIONS:
+        position += -position % 8
+        table += [position, len(memoryview(sections[name]).cast("B"))]
+        position += table[-1]
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(titles), bucket_size, graph_digest, *table))
+        for name, start in zip(SECTIONS, table[::2]):
+            f.write(b"\x00" * (start - f.tell()))
+            f.write(memoryview(sections[name]).cast("B"))
+
+
+class TitleTable:
+    """
+    Memory-mapped title <-> node id table. Opening maps the file and reads
+    the header; nothing is decoded until a title is asked for.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size or self._mmap[:8] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a title table file (or one from an older version)")
+        magic, self.num_titles, self.bucket_size, self.graph_digest, *table = _HEADER.unpack_from(
+            self._mmap
+        )
+        self._sections: dict[str, np.ndarray] = {}
+        for name, start, length in zip(SECTIONS, table[::2], table[1::2]):
+            dtype = np.dtype(_DTYPES[name])
+            self._sections[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=length // dtype.itemsize, offset=start
+            )
+        self._buckets_start = table[2 * SECTIONS.index("buckets")]
+
+    def __len__(self) -> int:
+        return self.num_titles
+
+    def _decode_bucket(self, bucket: int, count: int | None = None) -> list[str]:
+        """The first count (default all) titles of a bucket, in sorted order."""
+        offsets = self._sections["bucket_offsets"]
+        data = self._mmap
+        position = self._buckets_start + int(offsets[bucket])
+        end = self._buckets_start + int(offsets[bucket + 1])
+        length, position = _read_varint(data, position)
+        title = data[position : position + length]
+        position += length
+        titles = [title]
+        while position < end and (count is None or len(titles) < count):
+            shared, position = _read_varint(data, position)
+            length, position = _read_varint(data, position)
+            title = title[:shared] + data[position : position + length]
+            position += length
+            titles.append(title)
+        return [t.decode("utf-8") for t in titles]
+
+    def _title_at(self, rank: int) -> str:
+        bucket, index = divmod(rank, self.bucket_size)
+        return self._decode_bucket(bucket, index + 1)[index]
+
+    def title(self, node: int) -> str:
+        return self._title_at(int(self._sections["id_ranks"][node]))
+
+    def titles_of(self, nodes) -> list[str]:
+        """Titles of many nodes, decoding each bucket they fall in once."""
+        ranks = self._sections["id_ranks"][np.asarray(nodes, dtype=np.int64)]
+        decoded: dict[int, list[str]] = {}
+        titles = []
+        for rank in ranks.tolist():
+            bucket, index = divmod(rank, self.bucket_size)
+            if bucket not in decoded:
+                decoded[bucket] = self._decode_bucket(bucket)
+            titles.append(decoded[bucket][index])
+        return titles
+
+    def _lookup(self, hashes: str, ranks: str, key: str, keyed) -> list[int]:
+        """Ranks whose keyed(title) equals key, through one hash index."""
+        sorted_hashes = self._sections[hashes]
+        h = np.uint64(title_hash(key))
+        first = int(np.searchsorted(sorted_hashes, h))
+        found = []
+        while first < len(sorted_hashes) and sorted_hashes[first] == h:
+            rank = int(self._sections[ranks][first])
+            if keyed(self._title_at(rank)) == key:
+                found.append(rank)
+            first += 1
+        return found
+
+    def find(self, title: str) -> int | None:
+        """Node id of title as given, else of its normalized form, or None."""
+        for key in dict.fromkeys((title, normalizeTitle(title))):
+            ranks = self._lookup("hashes", "hash_ranks", key, str)
+            if ranks:
+                return int(self._sections["rank_ids"][ranks[0]])
+        return None
+
+    def find_any_case(self, title: str) -> list[int]:
+        """Node ids of every title equal to title ignoring case, in sorted title order."""
+        ranks = self._lookup("fold_hashes", "fold_ranks", fold_title(title), fold_title)
+        return [int(self._sections["rank_ids"][rank]) for rank in sorted(ranks)]
+
+    def ids_of(self, titles: list[str], normalize: bool = True) -> np.ndarray:
+        """
+        Node ids of many titles at once as an int32 array, -1 where a title
+        is unknown. Hashes are matched with one vectorized search; decoded
+        titles are only compared where two stored titles share a hash, so
+        an unknown title is reported missing except with odds of about
+        num_titles / 2**64.
+        """
+        keys = [normalizeTitle(t) for t in titles] if normalize else list(titles)
+        hashes = np.fromiter((title_hash(k) for k in keys), dtype=np.uint64, count=len(keys))
+        sorted_hashes = self._sections["hashes"]
+        positions = np.searchsorted(sorted_hashes, hashes)
+        inside = positions < len(sorted_hashes)
+        hit = np.zeros(len(keys), dtype=bool)
+        hit[inside] = sorted_hashes[positions[inside]] == hashes[inside]
+        ids = np.full(len(keys), -1, dtype=np.int32)
+        ranks = self._sections["hash_ranks"][positions[hit]]
+        ids[hit] = self._sections["rank_ids"][ranks]
+
+        # a shared hash: the first match may be the wrong title
+        after = positions + 1
+        shared = hit & (after < len(sorted_hashes))
+        shared[shared] = sorted_hashes[after[shared]] == hashes[shared]
+        for i in np.flatnonzero(shared).tolist():
+            ranks = self._lookup("hashes", "hash_ranks", keys[i], str)
+            ids[i] = self._sections["rank_ids"][ranks[0]] if ranks else -1
+        return ids
+
+    def prefix_search(self, prefix: str, limit: int = 10) -> list[tuple[str, int]]:
+        """
+        Up to limit (title, node id) pairs starting with prefix, in sorted
+        order. The prefix gets the title normalization that keeps it a
+        prefix: underscores become spaces and the first letter upper case.
+        """
+        prefix = prefix.replace("_", " ").lstrip()
+        prefix = prefix[:1].upper() + prefix[1:]
+        num_buckets = len(self._sections["bucket_offsets"]) - 1
+        heads = _BucketHeads(self, num_buckets)
+        bucket = max(bisect.bisect_left(heads, prefix) - 1, 0)
+        results = []
+        rank_ids = self._sections["rank_ids"]
+        while bucket < num_buckets and len(results) < limit:
+            for index, title in enumerate(self._decode_bucket(bucket)):
+                if title.startswith(prefix):
+                    node = int(rank_ids[bucket * self.bucket_size + index])
+                    results.append((title, node))
+                    if len(results) == limit:
+                        break
+                elif title > prefix:
+                    return results
+            bucket += 1
+        return results
+
+    def close(self):
+        self._sections.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # arrays handed out are still alive, the mapping goes with them
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _BucketHeads:
+    """The first title of every bucket as a lazy sequence, for bisect."""
+
+    def __init__(self, table: TitleTable, num_buckets: int):
+        self._table = table
+        self._num_buckets = num_buckets
+
+    def __len__(self) -> int:
+        return self._num_buckets
+
+    def __getitem__(self, bucket: int) -> str:
+        return self._table._decode_bucket(bucket, 1)[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the title table of a CSR graph file.")
+    parser.add_argument("graph", help="CSR graph file")
+    parser.add_argument("--output", help="title table to write (default: GRAPH.titles)")
+    parser.add_argument("--bucket-size", type=int, default=16, help="titles per front-coded bucket")
+    args = parser.parse_args()
+
+    from CSRGraph import CSRGraph
+
+    output = args.output or args.graph + ".titles"
+    start_time = time.time()
+    with CSRGraph(args.graph) as G:
+        titles = [G.title(v) for v in range(G.num_nodes)]
+        digest = G.digest
+    write_title_table(output, titles, args.bucket_size, digest)
+    raw = sum(len(t.encode("utf-8")) for t in titles)
+    print(
+        f"Wrote {output} ({len(titles)} titles, {os.path.getsize(output) / 1024**2:.1f} MB "
+        f"for {raw / 1024**2:.1f} MB of title text) in {time.time() - start_time:.2f} seconds"
+    )
@@ -1,23 +1,18 @@
-import ast
-import pickle
+import os
+import sys
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LoadLinks"))
+from RecordFile import decodeTitleLinks, readRecords
+
 startTime = time.perf_counter_ns()
 i = 0
-links_list = []
-with open("enwiki_links.pkl", "r") as f:
-    for line in f:
-        if not line.strip():
-            continue
-        bdata = ast.literal_eval(line.strip())
-        links_list.append(pickle.loads(bdata))
-        i += 1
+links = 0
+for record in readRecords("enwiki_links.rec"):
+    title, page_links = decodeTitleLinks(record)
+    links += len(page_links)
+    i += 1
 
 print(
-    f"Loaded {i} pages in {(time.perf_counter_ns() - startTime) / 1_000_000_000:.2f} seconds"
+    f"Loaded {i} pages ({links} links) in {(time.perf_counter_ns() - startTime) / 1_000_000_000:.2f} seconds"
 )
-
-pickle.dump(links_list, open("enwiki_links_list.pkl", "wb"))
-
-while True:
-    pass
@@ -0,0 +1,250 @@
+import bz2
+import collections
+import io
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_WRITE, _READ, _EOF, _CLOSED = range(4)
+
+
+class SharedRingBuffer:
+    """
+    Single-producer, single-consumer byte ring in shared memory. The producer
+    reads straight into free space with readinto(), the consumer copies out
+    with readinto(), so each byte is copied once on the way through.
+    """
+
+    def __init__(self, capacity: int = 16 * 1024 * 1024):
+        self.capacity = capacity
+        self._shm = shared_memory.SharedMemory(create=True, size=capacity)
+        # write/read positions only ever grow, the ring index is pos % capacity
+        self._state = mp.Array("q", 4, lock=False)
+        self._cond = mp.Condition()
+
+    def writeFrom(self, readinto, chunkSize: int) -> int:
+        """
+        Producer side, fill up to chunkSize bytes of contiguous free space by
+        calling readinto(memoryview). Returns the number of bytes written.
+        """
+        state = self._state
+        with self._cond:
+            while state[_WRITE] - state[_READ] >= self.capacity:
+                if state[_CLOSED]:
+                    return 0
+                self._cond.wait()
+            if state[_CLOSED]:
+                return 0
+            start = state[_WRITE] % self.capacity
+            free = self.capacity - (state[_WRITE] - state[_READ])
+            size = min(chunkSize, free, self.capacity - start)
+
+        n = readinto(self._shm.buf[start : start + size]) or 0
+
+        with self._cond:
+            state[_WRITE] += n
+            self._cond.notify_all()
+        return n
+
+    def setEof(self):
+        """Producer side, no more data will be written."""
+        with self._cond:
+            self._state[_EOF] = 1
+            self._cond.notify_all()
+
+    def readinto(self, b) -> int:
+        """Consumer side, copy available bytes into b. Returns 0 at EOF."""
+        state = self._state
+        with self._cond:
+            while state[_WRITE] == state[_READ]:
+                if state[_EOF]:
+                    return 0
+                self._cond.wait()
+            start = state[_READ] % self.capacity
+            size = min(
+                len(b), state[_WRITE] - state[_READ], self.capacity - start
+            )
+
+        b[:size] = self._shm.buf[start : start + size]
+
+        with self._cond:
+            state[_READ] += size
+            self._cond.notify_all()
+        return size
+
+    def close(self):
+        """Consumer side, stop the producer and free the shared memory."""
+        with self._cond:
+            self._state[_CLOSED] = 1
+            self._cond.notify_all()
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _ringWorker(filename: str, ring: SharedRingBuffer, chunkSize: int):
+    """Runs in a separate process, decompresses the bz2 file into the ring."""
+    try:
+        with bz2.open(filename, "rb") as f:  # open in binary
+            while ring.writeFrom(f.readinto, chunkSize):
+                pass
+    finally:
+        ring.setEof()  # signal end of stream
+
+
+class BZ2StreamWrapper(io.RawIOBase):
+    """
+    File-like reader over a single-stream bz2 file, decompressed by a
+    background process into a SharedRingBuffer.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        encoding: str = "utf-8",
+        chunkSize: int = 64 * 1024,
+        bufferSize: int = 16 * 1024 * 1024,
+    ):
+        self.filename = filename
+        self.encoding = encoding
+        self._ring = SharedRingBuffer(bufferSize)
+        self.process = mp.Process(
+            target=_ringWorker, args=(filename, self._ring, chunkSize)
+        )
+        self.process.start()
+
+    def readinto(self, b) -> int:
+        return self._ring.readinto(b)
+
+    def readable(self):
+        return True
+
+    def close(self):
+        if not self.closed:
+            self._ring.close()
+            self.process.join()
+        super().close()
+
+
+def readStreamOffsets(indexFilePath: str) -> list[int]:
+    """
+    Read the multistream index (lines of "offset:pageId:title") and return
+    the sorted, de-duplicated byte offsets of every bz2 stream it mentions.
+    """
+    offsets = set()
+    with bz2.open(indexFilePath, "rb") as f:
+        for line in f:
+            offset, _, _ = line.partition(b":")
+            if offset:
+                offsets.add(int(offset))
+    return sorted(offsets)
+
+
+def readStreamIndex(indexFilePath: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Read the multistream index into (offsets, firstPageIds) int64 arrays, one
+    entry per stream in file order. Dumps list pages in increasing id order,
+    so streamOffsetOf can binary search the stream holding any page.
+    """
+    offsets, firstPageIds = [], []
+    with bz2.open(indexFilePath, "rb") as f:
+        for line in f:
+            offset, _, rest = line.partition(b":")
+            if offset and (not offsets or int(offset) != offsets[-1]):
+                offsets.append(int(offset))
+                firstPageIds.append(int(rest.partition(b":")[0]))
+    return np.array(offsets, dtype=np.int64), np.array(firstPageIds, dtype=np.int64)
+
+
+def streamOffsetOf(streamIndex: tuple[np.ndarray, np.ndarray], pageId: int) -> int:
+    """Byte offset of the bz2 stream holding pageId (0 before the first stream)."""
+    offsets, firstPageIds = streamIndex
+    i = int(np.searchsorted(firstPageIds, pageId, side="right")) - 1
+    return int(offsets[i]) if i >= 0 else 0
+
+
+def streamRanges(
+    filename: str, offsets: list[int], streamsPerTask: int, start: int = 0
+) -> list[tuple[int, int]]:
+    """
+    Turn stream offsets into (start, end) byte ranges, each covering
+    streamsPerTask consecutive streams. The header stream before the first
+    indexed offset and the footer stream after the last one are included.
+    A start offset (a stream boundary) drops every stream before it.
+    """
+    fileSize = os.path.getsize(filename)
+    bounds = sorted({start, fileSize, *(o for o in offsets if start <= o < fileSize)})
+    cuts = bounds[::streamsPerTask]
+    if cuts[-1] != fileSize:
+        cuts.append(fileSize)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _decompressRange(filename: str, start: int, end: int) -> bytes:
+    """Runs in a pool worker, decompresses the concatenated streams in [start, end)."""
+    with open(filename, "rb") as f:
+        f.seek(start)
+        return bz2.decompress(f.read(end - start))
+
+
+class MultistreamBZ2Wrapper(io.RawIOBase):
+    """
+    File-like reader over a pages-articles-multistream dump. The independent
+    bz2 streams listed in the index are decompressed across a process pool
+    and handed back in file order. startOffset (a stream boundary, see
+    streamOffsetOf) starts reading part way through the dump.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        indexFilename: str,
+        numWorkers: int | None = None,
+        streamsPerTask: int = 16,
+        prefetch: int | None = None,
+        startOffset: int = 0,
+    ):
+        self.filename = filename
+        self.numWorkers = numWorkers or os.cpu_count() or 1
+        self._ranges = collections.deque(
+            streamRanges(
+                filename, readStreamOffsets(indexFilename), streamsPerTask, startOffset
+            )
+        )
+        self._prefetch = prefetch or self.numWorkers * 2
+        self._pool = mp.Pool(self.numWorkers)
+        self._pending: collections.deque = collections.deque()
+        self._chunk = memoryview(b"")
+        self._pos = 0
+        self._fill()
+
+    def _fill(self):
+        """Keep up to self._prefetch ranges in flight, in order."""
+        while self._ranges and len(self._pending) < self._prefetch:
+            start, end = self._ranges.popleft()
+            self._pending.append(
+                self._pool.apply_async(_decompressRange, (self.filename, start, end))
+            )
+
+    def readinto(self, b) -> int:
+        while self._pos >= len(self._chunk):
+            if not self._pending:
+                return 0  # EOF
+            self._chunk = memoryview(self._pending.popleft().get())
+            self._pos = 0
+            self._fill()
+
+        n = min(len(b), len(self._chunk) - self._pos)
+        b[:n] = self._chunk[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def readable(self):
+        return True
+
+    def close(self):
+        if not self.closed:
+            self._pool.terminate()
+            self._pool.join()
+        super().close()
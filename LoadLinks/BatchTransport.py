@@ -0,0 +1,156 @@
+import multiprocessing as mp
+import struct
+from array import array
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_TEXT_HEADER = struct.Struct("<II")  # items, fields per item
+_CONTROL = -1
+
+
+def packTextBatch(batch: list[tuple]) -> list:
+    """
+    Lay out a batch of string tuples as (header, int32 lengths, utf-8
+    payload). A length of -1 stands for None.
+    """
+    numFields = len(batch[0]) if batch else 0
+    encoded = [None if f is None else f.encode("utf-8") for item in batch for f in item]
+    lengths = array("i", [-1 if e is None else len(e) for e in encoded])
+    return [
+        _TEXT_HEADER.pack(len(batch), numFields),
+        lengths,
+        b"".join([e for e in encoded if e]),
+    ]
+
+
+def unpackTextBatch(view: memoryview) -> list[tuple]:
+    count, numFields = _TEXT_HEADER.unpack_from(view)
+    lengths = array("i")
+    lengths.frombytes(view[_TEXT_HEADER.size : _TEXT_HEADER.size + 4 * count * numFields])
+    position = _TEXT_HEADER.size + 4 * count * numFields
+    fields = []
+    for length in lengths:
+        if length < 0:
+            fields.append(None)
+        else:
+            fields.append(str(view[position : position + length], "utf-8"))
+            position += length
+    return list(zip(*[iter(fields)] * numFields))
+
+
+def packArrays(arrays: tuple) -> list:
+    """Lay out a tuple of int32 arrays as (lengths, data...)."""
+    arrays = [np.ascontiguousarray(a, dtype=np.int32) for a in arrays]
+    return [array("I", [len(arrays), *(len(a) for a in arrays)]), *arrays]
+
+
+def unpackArrays(view: memoryview) -> tuple:
+    (count,) = struct.unpack_from("<I", view)
+    lengths = struct.unpack_from(f"<{count}I", view, 4)
+    position = 4 * (count + 1)
+    arrays = []
+    for length in lengths:
+        arrays.append(np.frombuffer(view, np.int32, length, position).copy())
+        position += 4 * length
+    return tuple(arrays)
+
+
+def packIdBatch(batch: tuple) -> list:
+    """
+    Lay out a (new titles, int32 arrays) batch as the byte length of the
+    titles' text batch, the text batch, then packArrays of the arrays.
+    """
+    titles, arrays = batch
+    text = packTextBatch([(t,) for t in titles])
+    size = sum(len(memoryview(b).cast("B")) for b in text)
+    return [struct.pack("<Q", size), *text, *packArrays(arrays)]
+
+
+def unpackIdBatch(view: memoryview) -> tuple:
+    (size,) = struct.unpack_from("<Q", view)
+    titles = [title for (title,) in unpackTextBatch(view[8 : 8 + size])]
+    return titles, unpackArrays(view[8 + size :])
+
+
+class SharedBatchQueue:
+    """
+    Moves batches between processes through a slab of fixed-size slots in
+    shared memory. put() packs a batch straight into a free slot and only a
+    (slot, size) handle goes through the underlying mp.Queue; get() unpacks
+    it and hands the slot back. With every slot in use put() blocks, so
+    numSlots bounds the batches in flight. A batch larger than a slot still
+    takes a slot but travels inline.
+
+    None and strings (such as the "Done" poison pill) are passed through
+    as control messages. qsize() reads a shared counter, so unlike
+    mp.Queue.qsize() it works on macOS too. The creating process must call
+    close().
+    """
+
+    def __init__(
+        self,
+        numSlots: int = 4,
+        slotSize: int = 32 * 1024 * 1024,
+        pack=packTextBatch,
+        unpack=unpackTextBatch,
+    ):
+        self.numSlots = numSlots
+        self.slotSize = slotSize
+        self._pack = pack
+        self._unpack = unpack
+        self._shm = shared_memory.SharedMemory(create=True, size=numSlots * slotSize)
+        self._free: mp.Queue = mp.Queue()
+        self._ready: mp.Queue = mp.Queue()
+        self._depth = mp.Value("i", 0)
+        """Batches and control messages put but not yet taken."""
+
+        for slot in range(numSlots):
+            self._free.put(slot)
+
+    def put(self, batch):
+        if batch is None or isinstance(batch, str):
+            self._countPut()
+            self._ready.put((_CONTROL, batch))
+            return
+        buffers = [memoryview(b).cast("B") for b in self._pack(batch)]
+        size = sum(len(b) for b in buffers)
+        slot = self._free.get()
+        self._countPut()
+        if size > self.slotSize:
+            self._ready.put((slot, b"".join(buffers)))
+            return
+        position = slot * self.slotSize
+        for b in buffers:
+            self._shm.buf[position : position + len(b)] = b
+            position += len(b)
+        self._ready.put((slot, size))
+
+    def _countPut(self):
+        with self._depth.get_lock():
+            self._depth.value += 1
+
+    def get(self):
+        slot, payload = self._ready.get()
+        with self._depth.get_lock():
+            self._depth.value -= 1
+        if slot == _CONTROL:
+            return payload
+        if isinstance(payload, bytes):
+            batch = self._unpack(memoryview(payload))
+        else:
+            start = slot * self.slotSize
+            view = self._shm.buf[start : start + payload]
+            try:
+                batch = self._unpack(view)
+            finally:
+                view.release()
+        self._free.put(slot)
+        return batch
+
+    def qsize(self) -> int:
+        return self._depth.value
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
@@ -0,0 +1,28 @@
+import json
+import os
+
+
+def saveCheckpoint(filePath: str, state: dict):
+    """Atomically replace the checkpoint, a crash leaves the old one intact."""
+    tmpPath = filePath + ".tmp"
+    with open(tmpPath, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpPath, filePath)
+
+
+def loadCheckpoint(filePath: str) -> dict | None:
+    """The saved state, or None if there is no checkpoint to resume from."""
+    try:
+        with open(filePath, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def syncFile(f) -> int:
+    """Flush and fsync an open file, returning its position."""
+    f.flush()
+    os.fsync(f.fileno())
+    return f.tell()
@@ -1,118 +1,104 @@
-class Site:
-    name: str
-    """The name of the page."""
-    links: list[str]
-    """A list to store links to other sites' names."""
-
-    def __init__(self, name: str, links: list[str]):
-        self.name = name
-
-        self.links: list[str] = links
-
-
-import bz2
-import io
 import multiprocessing as mp
 import tracemalloc
 import xml.etree.ElementTree as ET
-import re
-import json
 import time
 from cProfile import Profile
 from pstats import SortKey, Stats
 import queue
-import io
-import bz2
-import multiprocessing as mp
-import tracemalloc
-
-
-class BZ2StreamWrapper(io.RawIOBase):
-    def __init__(self, filename, encoding="utf-8"):
-        self.filename = filename
-        self.encoding = encoding
-        self.queue = mp.Queue(maxsize=1000)  # buffer
-        self.process = mp.Process(target=self._worker, args=(self.queue,))
-        self.process.start()
-        self._buffer = b""  # work in bytes
-        self._eof = False
-
-    def _worker(self, queue):
-        """Runs in a separate process, reads bz2 file and sends lines."""
-        blob_size = 8192
-        try:
-            with bz2.open(self.filename, "rb") as f:  # open in binary
-                for chunk in iter(lambda: f.read(blob_size), b""):
-                    queue.put(chunk)
-        finally:
-            queue.put(None)  # signal end of stream
-
-    def read(self, size=-1):
-        """Provide file-like read(size)."""
-        # Fill buffer until we have enough or EOF
-        if self._eof and not self._buffer:
-            return b""
-
-        while size < 0 or len(self._buffer) < size:
-            chunk = self.queue.get()
-            if chunk is None:
-                self._eof = True
-                break  # EOF
-            self._buffer += chunk  # de-chunk and place in buffer
-
-        if size < 0:  # read all
-            data, self._buffer = self._buffer, b""
-        else:
-            data, self._buffer = self._buffer[:size], self._buffer[size:]
-        return data
-
-    def readable(self):
-        return True
-
-    def close(self):
-        super().close()
-        self.process.join()
-
-
-def loadXml(filePath: str, outputQueue: queue.Queue, batchSize: int, numWorkers: int):
+from array import array
+import os
+from BatchTransport import SharedBatchQueue, packIdBatch, unpackIdBatch
+from BZ2Streams import BZ2StreamWrapper, MultistreamBZ2Wrapper
+from LinkExtractor import extractLinks, extractLinksBatch
+from PageFilter import PageFilter
+from PageScanner import scanPages
+from RedirectTable import RedirectTable
+from Telemetry import CountingReader, Telemetry, TelemetryReporter
+from TitleDictionary import TitleDictionary
+from WorkerPool import AdaptiveWorkerPool
+import numpy as np
+
+_NO_LINKS = np.empty(0, dtype=np.int32)
+
+
+def loadXml(
+    filePath: str,
+    outputQueue: queue.Queue,
+    batchSize: int,
+    indexFilePath: str | None = None,
+    useScanner: bool = False,
+    telemetry: Telemetry | None = None,
+    pageFilter: PageFilter | None = None,
+):
     """
-    Loads and parses the XML file, putting (name, text) tuples into the outputQueue.
+    Loads and parses the XML file, putting (name, text, redirect) tuples into the
+    outputQueue. redirect is the target title of a redirect page, otherwise None.
+    With a multistream index the bz2 streams are decompressed in parallel.
+    useScanner reads pages with the byte-level PageScanner instead of iterparse.
+    Decompressed bytes and parsed pages are counted in telemetry.
+    pageFilter drops pages in the scanner before their text is decoded, and
+    implies useScanner.
     """
+    telemetry = telemetry or Telemetry()
+    parse = telemetry.stage("parse")
+    parse.begin()
+
+    def putBatch(batch: list):
+        t0 = time.perf_counter()
+        outputQueue.put(batch)
+        parse.blocked(time.perf_counter() - t0)
+        parse.count(pages=len(batch))
+
     with Profile() as profile:
         tracemalloc.start()
         batch = []
         try:
-            with BZ2StreamWrapper(filePath) as f:
-                # File loading occurs in background thread
-                context = ET.iterparse(f, events=("start", "end"))
-
-                # This thread will only parse XML and enqueue batches
-                _, root = next(context)  # get root element
-                current_page = ["", ""]
-                for event, elem in context:
-                    if event == "end":
-                        if elem.tag[-5:] == "title":
-                            current_page[0] = str(elem.text)
-                        elif elem.tag[-4:] == "text":
-                            current_page[1] = str(elem.text)
-                            page_data_tuple = (
-                                current_page[0],
-                                current_page[1],
-                            )
-                            # print(page_data_tuple)
-                            if current_page[0] and current_page[1]:
-                                batch.append(page_data_tuple)
-                                current_page = ["", ""]
-
-                                if len(batch) >= batchSize:
-                                    outputQueue.put(batch)
-                                    batch = []
-                            else:
-                                print(f"Skipping incomplete page: {current_page}")
-                    # elem.clear()
-                root.clear()  # free memory
-            outputQueue.put(batch)
-            outputQueue.put("Done")  # signal completion to workers
+            if indexFilePath:
+                f = MultistreamBZ2Wrapper(filePath, indexFilePath)
+            else:
+                f = BZ2StreamWrapper(filePath)
+            with f:
+                reader = CountingReader(f, telemetry.stage("decompress"), parse)
+                if useScanner or pageFilter is not None:
+                    for page in scanPages(reader, pageFilter=pageFilter):
+                        if page.title and page.text:
+                            batch.append((page.title, page.text, page.redirect))
+                            if len(batch) >= batchSize:
+                                putBatch(batch)
+                                batch = []
+                else:
+                    # File loading occurs in background thread
+                    context = ET.iterparse(reader, events=("start", "end"))
+
+                    # This thread will only parse XML and enqueue batches
+                    _, root = next(context)  # get root element
+                    current_page = ["", "", None]  # title, text, redirect
+                    for event, elem in context:
+                        if event == "end":
+                            if elem.tag[-5:] == "title":
+                                current_page[0] = str(elem.text)
+                            elif elem.tag[-8:] == "redirect":
+                                current_page[2] = elem.get("title")
+                            elif elem.tag[-4:] == "text":
+                                current_page[1] = str(elem.text)
+                                page_data_tuple = (
+                                    current_page[0],
+                                    current_page[1],
+                                    current_page[2],
+                                )
+                                # print(page_data_tuple)
+                                if current_page[0] and current_page[1]:
+                                    batch.append(page_data_tuple)
+                                    current_page = ["", "", None]
+
+                                    if len(batch) >= batchSize:
+                                        putBatch(batch)
+                                        batch = []
+                                else:
+                                    print(f"Skipping incomplete page: {current_page}")
+                        # elem.clear()
+                    root.clear()  # free memory
+            putBatch(batch)
         except KeyboardInterrupt as e:
             current, peak = tracemalloc.get_traced_memory()
             [print(x) for x in tracemalloc.take_snapshot().statistics("lineno")[:20]]
@@ -120,91 +106,171 @@ def loadXml(filePath: str, outputQueue: queue.Queue, batchSize: int, numWorkers:
             pass
         except Exception as e:
             print(f"Error occurred in LoadXml: {e}")
+        outputQueue.put("Done")  # always, the worker pool counts on one pill from here
         Stats(profile, stream=open("Logs/loadXml.txt", "a")).strip_dirs().sort_stats(
             SortKey.CUMULATIVE
         ).print_stats()
 
 
-def linkScanWorker(inputQueue: queue.Queue, result_queue: queue.Queue):
+class BatchInterner:
+    """
+    One worker's own TitleDictionary, so workers intern in parallel without
+    sharing state. encode() turns extracted pages into ids local to the
+    worker, together with the titles interned since the previous batch, which
+    is all the writer needs to keep its local-to-global remap for the slot.
+    Once the dictionary holds maxTitles titles it is started afresh before
+    the next batch, which is flagged so the writer starts a new remap too;
+    this keeps a worker's memory bounded however many titles it meets.
+    """
+
+    def __init__(self, slot: int, maxTitles: int = 1 << 19):
+        self.slot = slot
+        self.maxTitles = maxTitles
+        self.titles = TitleDictionary()
+        self._sent = 0
+
+    def encode(self, pages: list[tuple[str, str | None, list[str]]]) -> tuple[list[str], tuple]:
+        """
+        (title, redirect, links) pages to (new titles, ([slot, reset],
+        pageIds, linkCounts, targetIds, redirectSources, redirectTargets)),
+        the arrays being int32 and targetIds holding every page's links back
+        to back. reset is 1 if the ids start over from this batch. Redirect
+        pages only appear in the redirect arrays.
+        """
+        reset = len(self.titles) >= self.maxTitles
+        if reset:
+            self.titles = TitleDictionary()
+            self._sent = 0
+        getId, idsOf = self.titles.getId, self.titles.idsOf
+        pageIds, targetLists, redirectSources, redirectTargets = [], [], [], []
+        for title, redirect, links in pages:
+            if redirect is not None:
+                redirectSources.append(getId(title))
+                redirectTargets.append(getId(redirect))
+            else:
+                pageIds.append(getId(title))
+                targetLists.append(idsOf(links))
+        newTitles = self.titles.titles[self._sent :]
+        self._sent = len(self.titles)
+        arrays = (
+            np.array([self.slot, reset], dtype=np.int32),
+            np.array(pageIds, dtype=np.int32),
+            np.array([len(t) for t in targetLists], dtype=np.int32),
+            np.concatenate(targetLists or [_NO_LINKS]),
+            np.array(redirectSources, dtype=np.int32),
+            np.array(redirectTargets, dtype=np.int32),
+        )
+        return newTitles, arrays
+
+
+def linkScanWorker(
+    slot: int,
+    pills,
+    inputQueue: queue.Queue,
+    result_queue: queue.Queue,
+    telemetry: Telemetry | None = None,
+):
+    """
+    Extracts links and interns titles, run by AdaptiveWorkerPool as worker
+    number slot. Each batch result is a BatchInterner.encode() batch of
+    int32 ids local to this worker (pack it with packIdBatch). Each worker
+    keeps a bounded dictionary of the titles it met recently. Exits on the
+    "Done" pill, counting it in pills[slot].
+    """
+    extract = (telemetry or Telemetry()).stage("extract", slot)
+    extract.begin()
+    interner = BatchInterner(slot)
     with Profile() as profile:
         try:
             while True:
+                t0 = time.perf_counter()
                 batch_in = inputQueue.get()
+                extract.blocked(time.perf_counter() - t0)
                 if batch_in == "Done":  # Poison pill → exit
-                    result_queue.put("Done")  # signal completion
-                    print(f"[Worker] Shutting down.")
+                    pills[slot] += 1
+                    print(f"[Worker {slot}] Shutting down.")
                     break
 
-                batch_out = []
-                for title, text in batch_in:
-                    links = extractLinksFromText(text)
-                    site = Site(title, links)
-                    batch_out.append(site)
+                texts = [text for _, text, redirect in batch_in if redirect is None]
+                linkLists = iter(extractLinksBatch(texts))
+                batch_out = interner.encode(
+                    [
+                        (title, redirect, [] if redirect is not None else next(linkLists))
+                        for title, _, redirect in batch_in
+                    ]
+                )
+                t0 = time.perf_counter()
                 result_queue.put(batch_out)
+                extract.blocked(time.perf_counter() - t0)
+                extract.count(
+                    pages=len(batch_in),
+                    links=len(batch_out[1][3]),
+                    nbytes=sum(len(text) for text in texts),
+                )
         except KeyboardInterrupt as e:
             pass
         except Exception as e:
             print(f"Error occurred in LinkScanWorker: {e}")
         Stats(
-            profile, stream=open("Logs/linkScanner.txt", "a")
+            profile, stream=open(f"Logs/linkScanner-{slot}.txt", "a")
         ).strip_dirs().sort_stats(SortKey.CUMULATIVE).print_stats()
 
 
 def extractLinksFromText(text: str) -> list[str]:
     """
-    Extract the site name and URL from the text.
-    Returns a Site object if successful, otherwise None.
+    Extract the cleaned, de-duplicated link targets from the text.
     """
-    links = re.findall(r"\[\[.*?\]\]", text or "")
-    return links
+    return extractLinks(text)
 
 
-def clean_wikilink(link: str) -> str | None:
-    """
-    Clean a single wikilink and return the page title.
-    Returns None if the link should be discarded (files, categories, etc.).
+def deQueueAll(
+    inputQueue: queue.Queue,
+    outputFilePath: str,
+    titlesFilePath: str,
+    redirectsFilePath: str,
+    telemetry: Telemetry | None = None,
+):
     """
-    # Only handle things that look like wikilinks
-    if not (link.startswith("[[") and link.endswith("]]")):
-        return None
-
-    # Strip outer brackets
-    link = link[2:-2].strip()
-
-    # Split at pipe '|' and keep the first part (actual target, not display text)
-    link = link.split("|")[0].strip()
-
-    # Exclude unwanted namespaces or junk
-    bad_prefixes = ("file:", "image:", "category:", "wikipedia:", "wp:", "template:")
-    if any(link.lower().startswith(prefix) for prefix in bad_prefixes):
-        return None
-
-    return link if link else None
-
-
-def deQueueAll(inputQueue: queue.Queue, outputFilePath: str):
+    The single writer: maps the workers' local ids to global ones and
+    streams the edges to a binary file of int32 (source, target) pairs.
+    Every worker slot has its own remap, extended with the titles each
+    batch brings (and started afresh when the worker resets its
+    dictionary); only those new titles are interned here. Redirects are
+    collected into a RedirectTable. The title and redirect tables are
+    written to titlesFilePath and redirectsFilePath at the end.
     """
-    Streams cleaned results to a JSON file as {page_name: [links]} per line (JSONL format).
-    """
-    with open(outputFilePath, "w", encoding="utf-8") as f:
+    titles = TitleDictionary()
+    redirects = RedirectTable()
+    getId = titles.getNormalizedId
+    remaps: dict[int, array] = {}
+    write = (telemetry or Telemetry()).stage("write")
+    write.begin()
+    with open(outputFilePath, "wb") as f:
         while True:
+            t0 = time.perf_counter()
             item = inputQueue.get()
-            if item is None:
+            write.blocked(time.perf_counter() - t0)
+            if item is None or item == "Done":
                 break
-            for subItem in item:
-                # Clean each link before writing
-                cleaned_links = []
-                for l in subItem.links:
-                    clean = clean_wikilink(l)
-                    if clean:
-                        cleaned_links.append(clean)
-
-                # Deduplicate
-                cleaned_links = list(set(cleaned_links))
-
-                # Write to file
-                json.dump({subItem.name: cleaned_links}, f, ensure_ascii=False)
-                f.write("\n")
+            newTitles, (header, pageIds, linkCounts, targetIds, redirectSources, redirectTargets) = item
+            slot, reset = header.tolist()
+            if reset or slot not in remaps:
+                remaps[slot] = array("i")
+            remap = remaps[slot]
+            remap.extend(getId(title) for title in newTitles)
+            toGlobal = np.frombuffer(remap, dtype=np.int32)
+            for source, target in zip(
+                toGlobal[redirectSources].tolist(), toGlobal[redirectTargets].tolist()
+            ):
+                redirects.add(source, target)
+            edges = np.column_stack(
+                (toGlobal[np.repeat(pageIds, linkCounts)], toGlobal[targetIds])
+            )
+            del toGlobal  # the remap can only grow while no view is exported
+            edges.tofile(f)
+            write.count(pages=len(pageIds) + len(redirectSources), links=len(edges), nbytes=edges.nbytes)
+    titles.save(titlesFilePath)
+    redirects.save(redirectsFilePath)
 
 
 # def deQueueAll(inputQueue: queue.Queue, outputFilePath: str):
@@ -224,69 +290,70 @@ def deQueueAll(inputQueue: queue.Queue, outputFilePath: str):
 
 
 if __name__ == "__main__":
-    numThreads = 1
     batchSize = 1000
-    maxQueSize = batchSize * numThreads
+    # the loader, the writer and the decompression pool need CPU time too
+    maxWorkers = max((os.cpu_count() or 1) - 2, 1)
 
     # with Profile() as profile:
     startTime = time.time()
-    manager = mp.Manager()
-    rawXmlQueue: queue.Queue = manager.Queue(maxsize=maxQueSize)
-    batchedQueue: queue.Queue = manager.Queue()
-    resultsQueue: queue.Queue = manager.Queue()
-    outputFilePath = "linksOutput.jsonl"
+    # batches travel through shared memory, only slot handles are pickled
+    rawXmlQueue = SharedBatchQueue(numSlots=2 * maxWorkers, slotSize=64 * 1024 * 1024)
+    resultsQueue = SharedBatchQueue(
+        numSlots=2 * maxWorkers, slotSize=32 * 1024 * 1024, pack=packIdBatch, unpack=unpackIdBatch
+    )
+    outputFilePath = "Data/enwiki_edges.bin"
+    titlesFilePath = "Data/enwiki_titles.txt"
+    redirectsFilePath = "Data/enwiki_redirects.bin"
+    indexFilePath = "wikipedia-index.txt.bz2"  # multistream dump's index
+    os.makedirs("Logs", exist_ok=True)
+    telemetry = Telemetry(slots=4 * maxWorkers)  # room for workers started over the run
+    reporter = TelemetryReporter(
+        telemetry, {"rawXml": rawXmlQueue, "results": resultsQueue}
+    )
     try:
 
         loaderProcess = mp.Process(
             target=loadXml,
-            args=("wikipedia.xml.bz2", rawXmlQueue, batchSize, numThreads),
+            args=(
+                "wikipedia.xml.bz2",
+                rawXmlQueue,
+                batchSize,
+                indexFilePath if os.path.exists(indexFilePath) else None,
+            ),
+            kwargs={"telemetry": telemetry},
             name="LoaderProcess",
         )
         loaderProcess.start()
 
-        workerProcess = mp.Process(
-            target=linkScanWorker,
-            args=(rawXmlQueue, resultsQueue),
-            name="WorkerProcess",
-        )
-        workerProcess.start()
-
-        """
-        batchProducerProcess = mp.Process(
-            target=WikipediaLinkLoaderMT.batchProducer,
-            args=(rawXmlQueue, batchedQueue, batchSize, numThreads),
-            name="BatchProducerProcess",
+        pool = AdaptiveWorkerPool(
+            linkScanWorker, (rawXmlQueue, resultsQueue, telemetry), rawXmlQueue, telemetry, maxWorkers
         )
-        batchProducerProcess.start()
-
-        workerProcesses = []
-        for i in range(numThreads):
-            p = mp.Process(
-                target=WikipediaLinkLoaderMT.linkScanWorker,
-                args=(i, batchedQueue, resultsQueue),
-                name=f"WorkerProcess-{i}",
-            )
-            workerProcesses.append(p)
-            p.start()
-        """
+        pool.start()
 
         unloaderProcess = mp.Process(
             target=deQueueAll,
-            args=(resultsQueue, outputFilePath),
+            args=(resultsQueue, outputFilePath, titlesFilePath, redirectsFilePath, telemetry),
             name="UnloaderProcess",
         )
         unloaderProcess.start()
-        f = open("test.txt", "w+")
-        while True:
-            time.sleep(5)
-            # continue
-            print(  # Print stats
-                f"[Main] Raw XML Queue Size: {rawXmlQueue.qsize(): >3}, Batched Queue Size: {batchedQueue.qsize()}, Result Queue Size: {resultsQueue.qsize()} after {(time.time() - startTime):.2f} seconds.",
-                file=open("stats.log", "a"),
-                flush=True,
-            )
-            f.read()
+        lastReport = time.time()
+        while loaderProcess.is_alive():
+            loaderProcess.join(pool.interval)
+            change = pool.adjust()
+            if change:
+                print(f"[Main] {'Started' if change > 0 else 'Retired'} a worker, {pool.live()} running")
+            if time.time() - lastReport >= 5:
+                reporter.write()  # Logs/telemetry.json and Logs/telemetry.prom
+                lastReport = time.time()
+        pool.shutdown(pillsSent=1)  # the loader's "Done"
+        resultsQueue.put("Done")
+        unloaderProcess.join()
+        reporter.write()
     except KeyboardInterrupt:
         pass
+    finally:
+        rawXmlQueue.close()
+        resultsQueue.close()
     print(f"Execution time: {time.time() - startTime} seconds")
+    print(reporter.summary())
     # Stats(profile).strip_dirs().sort_stats(SortKey.CUMULATIVE).print_stats()
@@ -0,0 +1,235 @@
+import argparse
+import json
+import math
+import os
+import sqlite3
+import time
+from typing import BinaryIO
+
+from BZ2Streams import BZ2StreamWrapper, MultistreamBZ2Wrapper
+from LinkExtractor import extractLinks
+from PageScanner import PageRecord, scanPages
+from RecordFile import RecordWriter, encodeTitleLinks
+from TitleDictionary import normalizeTitle
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page_id INTEGER PRIMARY KEY,
+    sha1 TEXT NOT NULL,
+    title TEXT NOT NULL,
+    redirect TEXT,
+    links BLOB NOT NULL
+)
+"""
+
+
+class ChangeSet:
+    """What a new dump changed relative to the cache, keyed by normalized title."""
+
+    def __init__(self):
+        self.added: list[int] = []
+        """Page ids new in this dump."""
+
+        self.changed: list[int] = []
+        """Page ids whose revision sha1 or title changed."""
+
+        self.deleted: list[int] = []
+        """Page ids missing from this dump."""
+
+        self.unchanged = 0
+
+        self.updated: dict[str, list[str]] = {}
+        """New out-links of every added or changed page ([] for redirects)."""
+
+        self.removed: list[str] = []
+        """Titles that no longer have a page: deleted pages and old titles of moves."""
+
+    def save(self, filePath: str):
+        """Write the graph-facing part as JSON, for CSRGraph's --patch."""
+        with open(filePath, "w", encoding="utf-8") as f:
+            json.dump({"updated": self.updated, "removed": self.removed}, f, ensure_ascii=False)
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.deleted)} deleted, {self.unchanged} unchanged"
+        )
+
+
+class _CachedPages:
+    """
+    (sha1, title) of cached pages by id, read batchSize consecutive ids at a
+    time. Dumps list pages by increasing id, so each read serves the next
+    batchSize pages; an id outside the rows read starts a new read there.
+    """
+
+    def __init__(self, db: sqlite3.Connection, batchSize: int):
+        self._cursor = db.cursor()
+        self._batchSize = batchSize
+        self._rows: dict[int, tuple[str, str]] = {}
+        self._first, self._last = 1, 0
+
+    def get(self, pageId: int) -> tuple[str, str] | None:
+        if not self._first <= pageId <= self._last:
+            rows = self._cursor.execute(
+                "SELECT page_id, sha1, title FROM pages WHERE page_id >= ? ORDER BY page_id LIMIT ?",
+                (pageId, self._batchSize),
+            ).fetchall()
+            self._rows = {i: (sha1, title) for i, sha1, title in rows}
+            self._first = pageId
+            self._last = rows[-1][0] if len(rows) == self._batchSize else math.inf
+        return self._rows.get(pageId)
+
+
+class ExtractionCache:
+    """
+    Extracted links of every page, stored in sqlite and keyed by page id plus
+    the latest revision's sha1. Updating from a new dump only decodes and
+    extracts pages whose sha1 or title differs from the cached one, the
+    text of every other page is skipped by the scanner.
+    """
+
+    def __init__(self, filePath: str):
+        self._db = sqlite3.connect(filePath)
+        self._db.execute(_SCHEMA)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def update(self, stream: BinaryIO, batchSize: int = 10000) -> ChangeSet:
+        """
+        Bring the cache in line with the decompressed dump in stream. Cached
+        pages are read and re-extracted pages written back batchSize at a
+        time, so memory stays at about one batch however large the cache
+        is. The ids seen go to a temporary table, which the pages missing
+        from the dump are found against.
+        """
+        changes = ChangeSet()
+        cached = _CachedPages(self._db, batchSize)
+        previous: dict[int, tuple[str, str]] = {}  # cached (sha1, title) of pages being re-extracted
+        seen: list[tuple[int]] = []
+
+        def wantText(page: PageRecord) -> bool:
+            seen.append((page.id,))
+            row = cached.get(page.id)
+            if row == (page.sha1, normalizeTitle(page.title)):
+                return False
+            if row is not None:
+                previous[page.id] = row
+            return True
+
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS seen (page_id INTEGER PRIMARY KEY)")
+        self._db.execute("DELETE FROM seen")
+        rows = []
+        with self._db:
+            for page in scanPages(stream, wantText=wantText):
+                if len(seen) >= batchSize:
+                    self._markSeen(seen)
+                if page.text is None:
+                    changes.unchanged += 1
+                    continue
+                title = normalizeTitle(page.title)
+                old = previous.pop(page.id, None)
+                if old is None:
+                    changes.added.append(page.id)
+                else:
+                    changes.changed.append(page.id)
+                    if old[1] != title:
+                        changes.removed.append(old[1])
+                if page.redirect is not None:
+                    redirect, links = normalizeTitle(page.redirect), []
+                else:
+                    redirect, links = None, extractLinks(page.text)
+                changes.updated[title] = links
+                rows.append((page.id, page.sha1, title, redirect, "\n".join(links).encode("utf-8")))
+                if len(rows) >= batchSize:
+                    self._upsert(rows)
+                    rows = []
+            self._upsert(rows)
+            self._markSeen(seen)
+
+            missing = "FROM pages WHERE page_id NOT IN (SELECT page_id FROM seen)"
+            for pageId, title in self._db.execute(f"SELECT page_id, title {missing}").fetchall():
+                changes.deleted.append(pageId)
+                changes.removed.append(title)
+            self._db.execute(f"DELETE {missing}")
+        # a moved page's old title may have been taken over by another page
+        changes.removed = [t for t in changes.removed if t not in changes.updated]
+        return changes
+
+    def _markSeen(self, seen: list[tuple[int]]):
+        self._db.executemany("INSERT OR IGNORE INTO seen VALUES (?)", seen)
+        seen.clear()
+
+    def _upsert(self, rows: list[tuple]):
+        """Insert rows, overwriting cached pages whose sha1 or title differs."""
+        self._db.executemany(
+            """
+            INSERT INTO pages VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (page_id) DO UPDATE SET
+                sha1 = excluded.sha1, title = excluded.title,
+                redirect = excluded.redirect, links = excluded.links
+            WHERE sha1 != excluded.sha1 OR title != excluded.title
+            """,
+            rows,
+        )
+
+    def exportRecords(self, filePath: str, compression: str | None = None):
+        """Write the non-redirect pages as a RecordFile of title-links records."""
+        with RecordWriter(filePath, compression) as outputFile:
+            for title, links in self._db.execute(
+                "SELECT title, links FROM pages WHERE redirect IS NULL ORDER BY page_id"
+            ):
+                links = links.decode("utf-8").split("\n") if links else []
+                outputFile.write(encodeTitleLinks(title, links))
+
+    def exportRedirects(self, filePath: str):
+        """Write the redirects as "source\\ttarget" lines (see RedirectTable.fromTsv)."""
+        with open(filePath, "w", encoding="utf-8") as f:
+            for title, redirect in self._db.execute(
+                "SELECT title, redirect FROM pages WHERE redirect IS NOT NULL ORDER BY page_id"
+            ):
+                f.write(f"{title}\t{redirect}\n")
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def updateCache(
+    inputFilePath: str, cacheFilePath: str, indexFilePath: str | None = None
+) -> ChangeSet:
+    if indexFilePath:
+        f = MultistreamBZ2Wrapper(inputFilePath, indexFilePath)
+    else:
+        f = BZ2StreamWrapper(inputFilePath)
+    with f, ExtractionCache(cacheFilePath) as cache:
+        return cache.update(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-extract only the pages a new dump added or changed."
+    )
+    parser.add_argument("dump", nargs="?", default="wikipedia.xml.bz2")
+    parser.add_argument("--index", default="wikipedia-index.txt.bz2", help="multistream index")
+    parser.add_argument("--cache", default="Data/enwiki_cache.sqlite")
+    parser.add_argument("--records", default="Data/enwiki_links.rec")
+    parser.add_argument("--redirects", default="Data/enwiki_redirects.tsv")
+    parser.add_argument(
+        "--changes", default="Data/enwiki_changes.json", help="change set for CSRGraph --patch"
+    )
+    args = parser.parse_args()
+
+    start_time = time.time()
+    changes = updateCache(args.dump, args.cache, args.index if os.path.exists(args.index) else None)
+    print(f"{changes} in {time.time() - start_time:.2f} seconds")
+    changes.save(args.changes)
+    with ExtractionCache(args.cache) as cache:
+        cache.exportRecords(args.records)
+        cache.exportRedirects(args.redirects)
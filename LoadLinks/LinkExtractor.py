@@ -0,0 +1,38 @@
+import re
+
+# One pass per text: find "[[", skip unwanted namespaces, capture the target
+# up to "|", "#" or "]]", and drop the anchor. Nested links such as
+# [[File:x.jpg|caption [[Target]]]] are found because a target can never
+# contain a bracket, so the scan restarts at the inner "[[". Like the
+# "[[.*?]]" it replaced, a link never spans lines and needs its closing
+# "]]": after a "|" the rest of the line must still contain one.
+_LINK = re.compile(
+    r"\[\[[^\S\n]*"
+    r"(?![^\S\n]*(?i:file|image|category|wikipedia|wp|template):)"
+    r"([^\[\]|#\n]*?)[^\S\n]*"
+    r"(?:#[^\[\]|\n]*)?"
+    r"(?:\]\]|\|(?=.*?\]\]))"
+)
+
+
+def extractLinks(text: str) -> list[str]:
+    r"""
+    Return the cleaned, de-duplicated link targets of a page's wikitext in
+    order of first appearance. Same output as clean_wikilink over
+    re.findall(r"\[\[.*?\]\]"), except that #anchors are stripped and links
+    nested inside captions are kept.
+    """
+    links = dict.fromkeys(_LINK.findall(text or ""))
+    links.pop("", None)
+    return list(links)
+
+
+def extractLinksBatch(texts: list[str]) -> list[list[str]]:
+    """extractLinks for every text of a batch."""
+    findall = _LINK.findall
+    results = []
+    for text in texts:
+        links = dict.fromkeys(findall(text or ""))
+        links.pop("", None)
+        results.append(list(links))
+    return results
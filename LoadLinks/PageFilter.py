@@ -0,0 +1,109 @@
+import argparse
+import bisect
+import re
+
+
+class PageFilter:
+    """
+    Declarative page predicate that the PageScanner evaluates on the raw
+    page bytes, cheapest test first: namespace, page id, redirect flag and
+    text size (from the <text bytes="..."> attribute) before anything is
+    decoded, then the title pattern. Rejected pages never have their text
+    decoded. None means "don't filter on this".
+    """
+
+    def __init__(
+        self,
+        namespaces: set[int] | None = None,
+        redirects: bool | None = None,
+        titlePattern: str | None = None,
+        minBytes: int | None = None,
+        maxBytes: int | None = None,
+        idRanges: list[tuple[int, int]] | None = None,
+    ):
+        self.namespaces = frozenset(namespaces) if namespaces is not None else None
+        """Namespace numbers to keep."""
+
+        self.redirects = redirects
+        """True keeps only redirects, False drops them."""
+
+        self.titlePattern = re.compile(titlePattern) if titlePattern else None
+        """Regex the title must match (re.search)."""
+
+        self.minBytes = minBytes
+        self.maxBytes = maxBytes
+        """Bounds on the text size in bytes, as the dump records it."""
+
+        ranges: list[tuple[int, int]] = []
+        for first, last in sorted(idRanges or []):
+            if ranges and first <= ranges[-1][1] + 1:  # overlaps or touches the previous range
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], last))
+            else:
+                ranges.append((first, last))
+        self._rangeStarts = [first for first, _ in ranges]
+        self._rangeEnds = [last for _, last in ranges]
+        self.idRanges = ranges or None
+        """Inclusive (first, last) page id ranges to keep, sorted and merged."""
+
+    @classmethod
+    def articles(cls) -> "PageFilter":
+        """Main-namespace pages that are not redirects."""
+        return cls(namespaces={0}, redirects=False)
+
+    def rejectsHeader(self, ns: int, pageId: int, isRedirect: bool) -> bool:
+        if self.namespaces is not None and ns not in self.namespaces:
+            return True
+        if self.redirects is not None and isRedirect != self.redirects:
+            return True
+        if self.idRanges is not None:
+            i = bisect.bisect_right(self._rangeStarts, pageId) - 1
+            if i < 0 or pageId > self._rangeEnds[i]:
+                return True
+        return False
+
+    def rejectsSize(self, textBytes: int) -> bool:
+        return (self.minBytes is not None and textBytes < self.minBytes) or (
+            self.maxBytes is not None and textBytes > self.maxBytes
+        )
+
+    def rejectsTitle(self, title: str) -> bool:
+        return self.titlePattern is not None and not self.titlePattern.search(title)
+
+
+def addFilterArguments(parser: argparse.ArgumentParser):
+    """Command line options for PageFilter.fromArgs."""
+    parser.add_argument("--namespaces", type=int, nargs="*", help="namespace numbers to keep")
+    parser.add_argument(
+        "--redirects", choices=("keep", "only", "drop"), default="keep", help="redirect pages"
+    )
+    parser.add_argument("--title-pattern", help="regex page titles must match")
+    parser.add_argument("--min-bytes", type=int, help="smallest text size to keep")
+    parser.add_argument("--max-bytes", type=int, help="largest text size to keep")
+    parser.add_argument(
+        "--ids", nargs="*", metavar="FIRST-LAST", help="page id ranges to keep, inclusive"
+    )
+
+
+def fromArgs(args: argparse.Namespace) -> PageFilter | None:
+    """The PageFilter the options describe, or None if they filter nothing."""
+    redirects = {"keep": None, "only": True, "drop": False}[args.redirects]
+    idRanges = None
+    if args.ids:
+        idRanges = [tuple(int(i) for i in r.split("-", 1)) for r in args.ids]
+    if (
+        args.namespaces is None
+        and redirects is None
+        and not args.title_pattern
+        and args.min_bytes is None
+        and args.max_bytes is None
+        and idRanges is None
+    ):
+        return None
+    return PageFilter(
+        set(args.namespaces) if args.namespaces is not None else None,
+        redirects,
+        args.title_pattern,
+        args.min_bytes,
+        args.max_bytes,
+        idRanges,
+    )
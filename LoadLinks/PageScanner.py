@@ -0,0 +1,187 @@
+import re
+from typing import BinaryIO, Callable, Iterator
+
+from PageFilter import PageFilter
+
+PAGE_START = b"<page>"
+PAGE_END = b"</page>"
+
+_ENTITY = re.compile(r"&(#x[0-9a-fA-F]+|#[0-9]+|amp|lt|gt|quot|apos);")
+_NAMED = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+
+def _entity(match: re.Match) -> str:
+    name = match.group(1)
+    if name[0] != "#":
+        return _NAMED[name]
+    if name[1] == "x":
+        return chr(int(name[2:], 16))
+    return chr(int(name[1:]))
+
+
+def decodeXml(view: memoryview) -> str:
+    """Decode raw element content, resolving entities only when there are any."""
+    text = str(view, "utf-8")
+    if "\r" in text:  # XML line-end normalisation
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "&" in text:
+        text = _ENTITY.sub(_entity, text)
+    return text
+
+
+class PageRecord:
+    __slots__ = ("title", "ns", "id", "redirect", "text", "sha1")
+
+    def __init__(
+        self,
+        title: str,
+        ns: int,
+        pageId: int,
+        redirect: str | None,
+        text: str | None,
+        sha1: str = "",
+    ):
+        self.title = title
+        """The title of the page."""
+        self.ns = ns
+        """The namespace number, 0 for articles."""
+        self.id = pageId
+        """The page id."""
+        self.redirect = redirect
+        """The redirect target title, or None if the page is not a redirect."""
+        self.text = text
+        """The wikitext of the latest revision, None if it was not decoded."""
+        self.sha1 = sha1
+        """The base-36 sha1 of the latest revision's text."""
+
+
+def _between(buffer: bytes, openTag: bytes, closeTag: bytes, start: int, end: int):
+    """Return the (start, end) span of the content of the first openTag...closeTag."""
+    a = buffer.find(openTag, start, end)
+    if a < 0:
+        return -1, -1
+    a += len(openTag)
+    return a, buffer.find(closeTag, a, end)
+
+
+def _textSize(buffer: bytes, revision: int, end: int) -> int:
+    """Size of the page text from <text bytes="...">, or its raw length without one."""
+    a = buffer.find(b"<text", revision, end)
+    if a < 0:
+        return 0
+    tagEnd = buffer.find(b">", a, end)
+    b, c = _between(buffer, b'bytes="', b'"', a, tagEnd)
+    if b >= 0:
+        return int(buffer[b:c])
+    if buffer[tagEnd - 1] == 0x2F:  # self-closing <text ... />
+        return 0
+    return buffer.find(b"</text>", tagEnd, end) - tagEnd - 1
+
+
+def scanPage(
+    buffer: bytes,
+    start: int,
+    end: int,
+    wantText: Callable | None = None,
+    pageFilter: PageFilter | None = None,
+) -> PageRecord | None:
+    """
+    Extract the fields of the page in buffer[start:end]. If wantText is
+    given it sees the record before the text is decoded, and returning
+    False leaves record.text as None. Returns None for pages pageFilter
+    rejects, testing the undecoded bytes wherever it can.
+    """
+    view = memoryview(buffer)
+
+    a, b = _between(buffer, b"<ns>", b"</ns>", start, end)
+    ns = int(buffer[a:b]) if a >= 0 else 0
+
+    a, b = _between(buffer, b"<id>", b"</id>", start, end)
+    pageId = int(buffer[a:b]) if a >= 0 else 0
+
+    revision = buffer.find(b"<revision>", start, end)
+    if revision < 0:
+        revision = end
+    a, b = _between(buffer, b'<redirect title="', b'"', start, revision)
+
+    if pageFilter is not None:
+        if pageFilter.rejectsHeader(ns, pageId, a >= 0):
+            return None
+        if (
+            pageFilter.minBytes is not None or pageFilter.maxBytes is not None
+        ) and pageFilter.rejectsSize(_textSize(buffer, revision, end)):
+            return None
+
+    redirect = decodeXml(view[a:b]) if a >= 0 else None
+
+    a, b = _between(buffer, b"<title>", b"</title>", start, end)
+    title = decodeXml(view[a:b]) if a >= 0 else ""
+    if pageFilter is not None and pageFilter.rejectsTitle(title):
+        return None
+
+    a, b = _between(buffer, b"<sha1>", b"</sha1>", revision, end)
+    sha1 = buffer[a:b].decode("ascii") if a >= 0 else ""
+
+    record = PageRecord(title, ns, pageId, redirect, "", sha1)
+    if wantText is not None and not wantText(record):
+        record.text = None
+        return record
+
+    a = buffer.find(b"<text", revision, end)
+    if a >= 0:
+        a = buffer.find(b">", a, end)
+        if buffer[a - 1] != 0x2F:  # not a self-closing <text ... />
+            b = buffer.find(b"</text>", a, end)
+            record.text = decodeXml(view[a + 1 : b])
+    return record
+
+
+def scanPageBytes(
+    buffer: bytes,
+    start: int = 0,
+    end: int | None = None,
+    wantText: Callable | None = None,
+    pageFilter: PageFilter | None = None,
+) -> Iterator[PageRecord]:
+    """
+    Yield a PageRecord for every complete <page> in buffer[start:end] that
+    pageFilter accepts.
+    """
+    if end is None:
+        end = len(buffer)
+    while True:
+        a = buffer.find(PAGE_START, start, end)
+        if a < 0:
+            return
+        b = buffer.find(PAGE_END, a, end)
+        if b < 0:
+            return
+        page = scanPage(buffer, a, b, wantText, pageFilter)
+        if page is not None:
+            yield page
+        start = b + len(PAGE_END)
+
+
+def scanPages(
+    stream: BinaryIO,
+    blockSize: int = 4 * 1024 * 1024,
+    wantText: Callable | None = None,
+    pageFilter: PageFilter | None = None,
+) -> Iterator[PageRecord]:
+    """
+    Stream PageRecords from a decompressed dump without building any XML
+    elements. Only complete pages are scanned, the rest waits for more data.
+    Pages pageFilter rejects are skipped before their text is decoded.
+    """
+    buffer = b""
+    while True:
+        block = stream.read(blockSize)
+        if not block:
+            return
+        buffer = buffer + block if buffer else block
+        last = buffer.rfind(PAGE_END)
+        if last < 0:
+            continue
+        last += len(PAGE_END)
+        yield from scanPageBytes(buffer, 0, last, wantText, pageFilter)
+        buffer = buffer[last:]
@@ -0,0 +1,142 @@
+import bz2
+import lzma
+import os
+import struct
+import zlib
+from typing import Iterable, Iterator
+
+import numpy as np
+
+# File layout: an 8 byte header (magic, version, compression), then blocks of
+#   count (u32), raw length (u32), stored length (u32), stored payload
+# where the raw payload is the block's records, each a u32 length + bytes.
+MAGIC = b"WLRC"
+VERSION = 1
+_FILE_HEADER = struct.Struct("<4sBB2x")
+_BLOCK_HEADER = struct.Struct("<III")
+_LENGTH = struct.Struct("<I")
+
+COMPRESSORS = {
+    None: (0, None, None),
+    "zlib": (1, zlib.compress, zlib.decompress),
+    "bz2": (2, bz2.compress, bz2.decompress),
+    "lzma": (3, lzma.compress, lzma.decompress),
+}
+_DECOMPRESSORS = {code: d for code, _, d in COMPRESSORS.values()}
+
+
+class RecordWriter:
+    """
+    Streams length-prefixed binary records to a file, batched into blocks
+    that are optionally compressed ("zlib", "bz2" or "lzma"). append=True
+    continues an existing file, first cut back to truncate bytes if given.
+    """
+
+    def __init__(
+        self,
+        filePath: str,
+        compression: str | None = None,
+        blockSize: int = 1024 * 1024,
+        append: bool = False,
+        truncate: int | None = None,
+    ):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown compression {compression!r}")
+        self.code, self._compress, _ = COMPRESSORS[compression]
+        self.blockSize = blockSize
+        self._block = bytearray()
+        self._count = 0
+        if append:
+            self._file = open(filePath, "r+b")
+            if truncate is not None:
+                self._file.truncate(truncate)  # drop blocks after a checkpoint
+            self._file.seek(0, 2)
+        else:
+            self._file = open(filePath, "wb")
+            self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, self.code))
+
+    def write(self, record: bytes):
+        self._block += _LENGTH.pack(len(record))
+        self._block += record
+        self._count += 1
+        if len(self._block) >= self.blockSize:
+            self.flush()
+
+    def writeMany(self, records: Iterable[bytes]):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Write out the pending block, if any."""
+        if not self._count:
+            return
+        stored = self._compress(self._block) if self._compress else self._block
+        self._file.write(_BLOCK_HEADER.pack(self._count, len(self._block), len(stored)))
+        self._file.write(stored)
+        self._block = bytearray()
+        self._count = 0
+
+    def tell(self) -> int:
+        """File position after the last flushed block."""
+        return self._file.tell()
+
+    def commit(self) -> int:
+        """Flush and fsync everything written so far, returning the file position."""
+        self.flush()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def readRecords(filePath: str) -> Iterator[bytes]:
+    """Yield every record of the file, one block in memory at a time."""
+    with open(filePath, "rb") as f:
+        magic, version, code = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{filePath} is not a record file")
+        decompress = _DECOMPRESSORS[code]
+        unpackLength = _LENGTH.unpack_from
+        while True:
+            header = f.read(_BLOCK_HEADER.size)
+            if len(header) < _BLOCK_HEADER.size:
+                return
+            count, _, storedLength = _BLOCK_HEADER.unpack(header)
+            block = f.read(storedLength)
+            if decompress:
+                block = decompress(block)
+            position = 0
+            for _ in range(count):
+                (length,) = unpackLength(block, position)
+                position += 4
+                yield block[position : position + length]
+                position += length
+
+
+def encodeTitleLinks(title: str, links: list[str]) -> bytes:
+    """A page record of titles, one per line (titles never contain newlines)."""
+    return "\n".join([title, *links]).encode("utf-8")
+
+
+def decodeTitleLinks(record: bytes) -> tuple[str, list[str]]:
+    title, *links = record.decode("utf-8").split("\n")
+    return title, links
+
+
+def encodeIdLinks(pageId: int, targetIds: np.ndarray) -> bytes:
+    """A page record of int32 ids, the page's first then its targets."""
+    return struct.pack("<i", pageId) + np.asarray(targetIds, dtype="<i4").tobytes()
+
+
+def decodeIdLinks(record: bytes) -> tuple[int, np.ndarray]:
+    ids = np.frombuffer(record, dtype="<i4")
+    return int(ids[0]), ids[1:]
@@ -0,0 +1,80 @@
+from array import array
+
+import numpy as np
+
+from TitleDictionary import TitleDictionary
+
+
+class RedirectTable:
+    """Compact (sourceId, targetId) redirect pairs collected while pages stream past."""
+
+    def __init__(self):
+        self.sources = array("i")
+        """Title ids of redirect pages."""
+
+        self.targets = array("i")
+        """Title ids the redirects point at, parallel to sources."""
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def add(self, sourceId: int, targetId: int):
+        self.sources.append(sourceId)
+        self.targets.append(targetId)
+
+    def canonical(self, numIds: int, maxHops: int = 32) -> np.ndarray:
+        """
+        Return an int32 array mapping every id to the page its redirect chain
+        ends at (ids that are not redirects map to themselves). Chains are
+        followed by pointer jumping, so maxHops=32 covers chains of 2**32.
+        Redirects caught in a loop are left pointing at themselves.
+        """
+        canon = np.arange(numIds, dtype=np.int32)
+        sources = np.frombuffer(self.sources, dtype=np.int32)
+        canon[sources] = np.frombuffer(self.targets, dtype=np.int32)
+        for _ in range(maxHops):
+            jumped = canon[canon]
+            if np.array_equal(jumped, canon):
+                break
+            canon = jumped
+        looped = canon[canon] != canon
+        canon[looped] = np.flatnonzero(looped)
+        return canon
+
+    def save(self, filePath: str):
+        """Write the pairs as int32 (source, target) rows."""
+        np.column_stack(
+            (np.frombuffer(self.sources, np.int32), np.frombuffer(self.targets, np.int32))
+        ).tofile(filePath)
+
+    @classmethod
+    def load(cls, filePath: str) -> "RedirectTable":
+        table = cls()
+        pairs = np.fromfile(filePath, dtype=np.int32).reshape(-1, 2)
+        table.sources.frombytes(np.ascontiguousarray(pairs[:, 0]).tobytes())
+        table.targets.frombytes(np.ascontiguousarray(pairs[:, 1]).tobytes())
+        return table
+
+    @classmethod
+    def fromTsv(cls, filePath: str, titles: TitleDictionary) -> "RedirectTable":
+        """Read "source\\ttarget" title lines, interning them into titles."""
+        table = cls()
+        with open(filePath, encoding="utf-8") as f:
+            for line in f:
+                source, _, target = line.rstrip("\n").partition("\t")
+                table.add(titles.getId(source), titles.getId(target))
+        return table
+
+
+def resolveEdges(edges: np.ndarray, canon: np.ndarray) -> np.ndarray:
+    """
+    Rewrite (source, target) edges so targets are canonical pages. Edges out
+    of redirect pages, self-loops created by the rewrite and duplicates are
+    dropped.
+    """
+    sources, targets = edges[:, 0], canon[edges[:, 1]]
+    keep = (canon[sources] == sources) & (targets != sources)
+    keys = np.unique(
+        (sources[keep].astype(np.uint64) << 32) | targets[keep].astype(np.uint64)
+    )
+    return np.column_stack((keys >> 32, keys & 0xFFFFFFFF)).astype(np.int32)
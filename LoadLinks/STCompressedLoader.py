@@ -1,112 +1,199 @@
-import bz2
-import io
-import multiprocessing as mp
+import argparse
 import xml.etree.ElementTree as ET
-import re
-import json
 import time
-import queue
-import io
-import bz2
-import multiprocessing as mp
-import pickle
-
-
-class BZ2StreamWrapper(io.RawIOBase):
-    _inQueue: int = 0
-
-    def __init__(self, filename, encoding="utf-8"):
-        self.filename = filename
-        self.encoding = encoding
-        self.queue = mp.Queue(maxsize=1000)  # buffer
-        self.process = mp.Process(target=self._worker, args=(self.queue,))
-        self.process.start()
-        self._buffer = b""  # work in bytes
-        self._eof = False
-        self._inQueue = 0
-
-    def _worker(self, queue):
-        """Runs in a separate process, reads bz2 file and sends lines."""
-        blob_size = 8192
-        try:
-            with bz2.open(self.filename, "rb") as f:  # open in binary
-                for chunk in iter(lambda: f.read(blob_size), b""):
-                    queue.put(chunk)
-                    self._inQueue += 1
-        finally:
-            queue.put(None)  # signal end of stream
-
-    def read(self, size=-1):
-        """Provide file-like read(size)."""
-        # Fill buffer until we have enough or EOF
-        if self._eof and not self._buffer:
-            return b""
-
-        while size < 0 or len(self._buffer) < size:
-            chunk = self.queue.get()
-            self._inQueue -= 1
-            if chunk is None:
-                self._eof = True
-                break  # EOF
-            self._buffer += chunk  # de-chunk and place in buffer
-
-        if size < 0:  # read all
-            data, self._buffer = self._buffer, b""
-        else:
-            data, self._buffer = self._buffer[:size], self._buffer[size:]
-        return data
-
-    def readable(self):
-        return True
-
-    def close(self):
-        super().close()
-        self.process.join()
-
-
-def loadXml(inputFilePath: str, outputFilePath: str):
+import os
+from BZ2Streams import (
+    BZ2StreamWrapper,
+    MultistreamBZ2Wrapper,
+    readStreamIndex,
+    streamOffsetOf,
+)
+from Checkpoint import loadCheckpoint, saveCheckpoint, syncFile
+from LinkExtractor import extractLinks
+from PageFilter import PageFilter, addFilterArguments, fromArgs
+from PageScanner import scanPages
+from RecordFile import RecordWriter, encodeTitleLinks
+from TitleDictionary import normalizeTitle
+
+
+def loadXml(
+    inputFilePath: str,
+    outputFilePath: str,
+    indexFilePath: str | None = None,
+    useScanner: bool = False,
+    redirectsFilePath: str | None = None,
+    compression: str | None = None,
+    checkpointFilePath: str | None = None,
+    checkpointInterval: float = 60.0,
+    resume: bool = False,
+    pageFilter: PageFilter | None = None,
+):
     """
     Loads and parses the XML file, putting (name, text) tuples into the outputQueue.
+    With a multistream index the bz2 streams are decompressed in parallel.
+    useScanner reads pages with the byte-level PageScanner instead of iterparse.
+    Redirect pages are written to redirectsFilePath as "source\ttarget" lines
+    (see RedirectTable.fromTsv) instead of being thrown away.
+    Pages are written as RecordFile title-links records, blocks optionally
+    compressed with compression ("zlib", "bz2" or "lzma").
+    With checkpointFilePath the outputs are synced every checkpointInterval
+    seconds and the position saved, resume=True then carries on from the
+    last checkpoint (see loadXmlCheckpointed).
+    pageFilter drops pages in the scanner before their text is decoded, and
+    implies useScanner. Redirects it drops are not written either.
     """
+    if checkpointFilePath:
+        loadXmlCheckpointed(
+            inputFilePath,
+            outputFilePath,
+            checkpointFilePath,
+            indexFilePath,
+            redirectsFilePath,
+            compression,
+            checkpointInterval,
+            resume,
+            pageFilter,
+        )
+        return
     try:
-        with BZ2StreamWrapper(inputFilePath) as f:
-            with open(outputFilePath, "w+", encoding="utf-8") as outputFile:
-                # File loading occurs in background thread
-                context = ET.iterparse(f, events=("start", "end"))
-
-                # This thread will only parse XML and enqueue batches
-                _, root = next(context)  # get root element
-                current_page: list[str] = ["", ""]  # title, text
-                for event, elem in context:
-                    if event == "start":  # end
-                        # print(elem.tag)
-                        if elem.tag[-5:] == "title":
-                            current_page[0] = elem.text
-                        elif elem.tag[-4:] == "text":
-                            current_page[1] = elem.text
-                            if (
-                                current_page[0]
-                                and current_page[1]
-                                and current_page[1][:9] != "#REDIRECT"
-                            ):
-                                l = scanLinks(current_page)  # TODO
-                                # json.dump(l, outputFile, ensure_ascii=False)
-                                print(pickle.dumps(l), file=outputFile)
-                                # outputFile.write("\n")
-                                # outputFile.flush()
-                                current_page = ["", ""]
-
-                            elif current_page[0] or current_page[1]:
-                                # print(f"Skipping incomplete page: {current_page}")
-                                current_page = ["", ""]
-                            else:
-                                pass  # empty page, skip
-                    elem.clear()
-                root.clear()  # free memory
+        if indexFilePath:
+            f = MultistreamBZ2Wrapper(inputFilePath, indexFilePath)
+        else:
+            f = BZ2StreamWrapper(inputFilePath)
+        with f:
+            with RecordWriter(outputFilePath, compression) as outputFile, open(
+                redirectsFilePath or os.devnull, "w", encoding="utf-8"
+            ) as redirectsFile:
+                if useScanner or pageFilter is not None:
+                    for page in scanPages(f, pageFilter=pageFilter):
+                        if page.redirect is not None:
+                            writeRedirect(redirectsFile, page.title, page.redirect)
+                        elif page.title and page.text:
+                            l = scanLinks([page.title, page.text])
+                            outputFile.write(encodeTitleLinks(*l))
+                else:
+                    # File loading occurs in background thread
+                    context = ET.iterparse(f, events=("start", "end"))
+
+                    # This thread will only parse XML and enqueue batches
+                    _, root = next(context)  # get root element
+                    current_page: list[str] = ["", ""]  # title, text
+                    for event, elem in context:
+                        if event == "start":  # end
+                            # print(elem.tag)
+                            if elem.tag[-5:] == "title":
+                                current_page[0] = elem.text
+                            elif elem.tag[-8:] == "redirect" and current_page[0]:
+                                writeRedirect(
+                                    redirectsFile, current_page[0], elem.get("title")
+                                )
+                            elif elem.tag[-4:] == "text":
+                                current_page[1] = elem.text
+                                if (
+                                    current_page[0]
+                                    and current_page[1]
+                                    and current_page[1][:9] != "#REDIRECT"
+                                ):
+                                    l = scanLinks(current_page)  # TODO
+                                    # json.dump(l, outputFile, ensure_ascii=False)
+                                    outputFile.write(encodeTitleLinks(*l))
+                                    # outputFile.write("\n")
+                                    # outputFile.flush()
+                                    current_page = ["", ""]
+
+                                elif current_page[0] or current_page[1]:
+                                    # print(f"Skipping incomplete page: {current_page}")
+                                    current_page = ["", ""]
+                                else:
+                                    pass  # empty page, skip
+                        elem.clear()
+                    root.clear()  # free memory
     except Exception as e:
         print(f"Error occurred in LoadXml: {e}")
 
 
+def loadXmlCheckpointed(
+    inputFilePath: str,
+    outputFilePath: str,
+    checkpointFilePath: str,
+    indexFilePath: str | None = None,
+    redirectsFilePath: str | None = None,
+    compression: str | None = None,
+    checkpointInterval: float = 60.0,
+    resume: bool = False,
+    pageFilter: PageFilter | None = None,
+):
+    """
+    loadXml with periodic checkpoints of (bz2 stream offset, last committed
+    page id, output file positions). On resume the outputs are cut back to
+    the checkpoint, reading restarts at the bz2 stream holding the last
+    committed page and pages up to it are skipped, so no record is lost or
+    written twice. This relies on the dump's pages being in id order and
+    reads with the PageScanner. Without a multistream index the dump is
+    decompressed from the start again, but skipped pages are not extracted.
+    The checkpoint is removed once the whole dump is written.
+    """
+    state = loadCheckpoint(checkpointFilePath) if resume else None
+    streamIndex = readStreamIndex(indexFilePath) if indexFilePath else None
+    lastPageId = state["lastPageId"] if state else 0
+    pageCount = state["pages"] if state else 0
+    if streamIndex is not None:
+        f = MultistreamBZ2Wrapper(
+            inputFilePath, indexFilePath, startOffset=streamOffsetOf(streamIndex, lastPageId)
+        )
+    else:
+        f = BZ2StreamWrapper(inputFilePath)
+    if state and redirectsFilePath:
+        os.truncate(redirectsFilePath, state["redirects"])
+
+    with f, RecordWriter(
+        outputFilePath,
+        compression,
+        append=state is not None,
+        truncate=state["records"] if state else None,
+    ) as outputFile, open(
+        redirectsFilePath or os.devnull, "a" if state else "w", encoding="utf-8"
+    ) as redirectsFile:
+
+        def checkpoint():
+            saveCheckpoint(
+                checkpointFilePath,
+                {
+                    "streamOffset": streamOffsetOf(streamIndex, lastPageId)
+                    if streamIndex is not None
+                    else 0,
+                    "lastPageId": lastPageId,
+                    "pages": pageCount,
+                    "records": outputFile.commit(),
+                    "redirects": syncFile(redirectsFile),
+                },
+            )
+
+        skipped = lastPageId
+        lastCheckpoint = time.time()
+        for page in scanPages(
+            f, wantText=lambda page: page.id > skipped, pageFilter=pageFilter
+        ):
+            if page.id <= skipped:
+                continue
+            if page.redirect is not None:
+                writeRedirect(redirectsFile, page.title, page.redirect)
+            elif page.title and page.text:
+                outputFile.write(encodeTitleLinks(*scanLinks([page.title, page.text])))
+            lastPageId = page.id
+            pageCount += 1
+            if time.time() - lastCheckpoint >= checkpointInterval:
+                checkpoint()
+                lastCheckpoint = time.time()
+        checkpoint()
+    os.remove(checkpointFilePath)
+
+
+def writeRedirect(redirectsFile, title: str, target: str):
+    """Write one normalized "source\ttarget" redirect line."""
+    redirectsFile.write(f"{normalizeTitle(title)}\t{normalizeTitle(target)}\n")
+
+
 def clean_wikilink(link: str) -> str | None:
     """
     Clean a single wikilink and return the page title.
@@ -132,17 +219,31 @@ def clean_wikilink(link: str) -> str | None:
 
 def scanLinks(inputTuple: list[str]) -> tuple[str, list[str]]:
     title, text = inputTuple
-    linksRaw = re.findall(r"\[\[.*?\]\]", text or "")
-    links = set()
-    for link in linksRaw:
-        cleaned_link = clean_wikilink(link)
-        if cleaned_link:
-            links.add(cleaned_link)
-    return (title, list(links))
+    return (title, extractLinks(text))
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract page links from a dump.")
+    parser.add_argument(
+        "--resume", action="store_true", help="carry on from the last checkpoint"
+    )
+    parser.add_argument(
+        "--checkpoint-interval", type=float, default=60.0, help="seconds between checkpoints"
+    )
+    addFilterArguments(parser)
+    args = parser.parse_args()
+
     start_time = time.time()
-    loadXml("wikipedia.xml.bz2", "Data/enwiki_links.pkl")
+    indexFilePath = "wikipedia-index.txt.bz2"  # multistream dump's index
+    loadXml(
+        "wikipedia.xml.bz2",
+        "Data/enwiki_links.rec",
+        indexFilePath if os.path.exists(indexFilePath) else None,
+        redirectsFilePath="Data/enwiki_redirects.tsv",
+        checkpointFilePath="Data/enwiki_links.checkpoint",
+        checkpointInterval=args.checkpoint_interval,
+        resume=args.resume,
+        pageFilter=fromArgs(args),
+    )
     end_time = time.time()
     print(f"Completed in {end_time - start_time:.2f} seconds.")
@@ -0,0 +1,125 @@
+import collections
+import multiprocessing as mp
+import os
+import time
+from typing import BinaryIO, Iterator
+
+from BZ2Streams import BZ2StreamWrapper, MultistreamBZ2Wrapper
+from PageFilter import PageFilter
+from PageScanner import PAGE_END, PAGE_START, scanPageBytes
+from RecordFile import RecordWriter, encodeTitleLinks
+from STCompressedLoader import scanLinks, writeRedirect
+
+
+def iterShards(stream: BinaryIO, shardSize: int = 8 * 1024 * 1024) -> Iterator[bytes]:
+    """
+    Split a decompressed dump into shards of whole <page> elements, each at
+    least shardSize bytes (except the last). The siteinfo header and the
+    closing </mediawiki> tag are dropped.
+    """
+    buffer = bytearray()
+    started = False
+    while True:
+        block = stream.read(shardSize)
+        if block:
+            buffer += block
+        if not started:
+            start = buffer.find(PAGE_START)
+            if start < 0:
+                if not block:
+                    return
+                continue
+            del buffer[:start]
+            started = True
+
+        if block and len(buffer) < shardSize:
+            continue
+        end = buffer.rfind(PAGE_END)
+        if end >= 0:
+            end += len(PAGE_END)
+            yield bytes(buffer[:end])
+            del buffer[:end]
+        if not block:
+            return
+
+
+def parseShard(
+    shard: bytes, pageFilter: PageFilter | None = None
+) -> list[tuple[str, str | None, list[str]]]:
+    """
+    Runs in a pool worker, parses the pages of one shard that pageFilter
+    accepts and extracts their links, as (title, redirect, links) tuples.
+    Redirect pages come with their target and no links.
+    """
+    results = []
+    for page in scanPageBytes(shard, pageFilter=pageFilter):
+        if page.redirect is not None:
+            results.append((page.title, page.redirect, []))
+        elif page.title and page.text:
+            results.append((page.title, None, scanLinks([page.title, page.text])[1]))
+    return results
+
+
+def extractSharded(
+    stream: BinaryIO,
+    numWorkers: int | None = None,
+    shardSize: int = 8 * 1024 * 1024,
+    prefetch: int | None = None,
+    pageFilter: PageFilter | None = None,
+) -> Iterator[tuple[str, str | None, list[str]]]:
+    """
+    Parse and extract the stream's pages on a process pool, yielding
+    parseShard's (title, redirect, links) in page order regardless of which
+    worker finished first.
+    """
+    numWorkers = numWorkers or os.cpu_count() or 1
+    prefetch = prefetch or numWorkers * 2
+    pending: collections.deque = collections.deque()
+    with mp.Pool(numWorkers) as pool:
+        for shard in iterShards(stream, shardSize):
+            pending.append(pool.apply_async(parseShard, (shard, pageFilter)))
+            if len(pending) >= prefetch:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def loadXml(
+    inputFilePath: str,
+    outputFilePath: str,
+    indexFilePath: str | None = None,
+    numWorkers: int | None = None,
+    compression: str | None = None,
+    pageFilter: PageFilter | None = None,
+    redirectsFilePath: str | None = None,
+):
+    """
+    Sharded equivalent of STCompressedLoader.loadXml, writes one RecordFile
+    title-links record per page and the redirects to redirectsFilePath as
+    "source\ttarget" lines (see RedirectTable.fromTsv).
+    """
+    if indexFilePath:
+        f = MultistreamBZ2Wrapper(inputFilePath, indexFilePath)
+    else:
+        f = BZ2StreamWrapper(inputFilePath)
+    with f, RecordWriter(outputFilePath, compression) as outputFile, open(
+        redirectsFilePath or os.devnull, "w", encoding="utf-8"
+    ) as redirectsFile:
+        for title, redirect, links in extractSharded(f, numWorkers, pageFilter=pageFilter):
+            if redirect is not None:
+                writeRedirect(redirectsFile, title, redirect)
+            else:
+                outputFile.write(encodeTitleLinks(title, links))
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    indexFilePath = "wikipedia-index.txt.bz2"  # multistream dump's index
+    loadXml(
+        "wikipedia.xml.bz2",
+        "Data/enwiki_links.rec",
+        indexFilePath if os.path.exists(indexFilePath) else None,
+        redirectsFilePath="Data/enwiki_redirects.tsv",
+    )
+    end_time = time.time()
+    print(f"Completed in {end_time - start_time:.2f} seconds.")
@@ -0,0 +1,165 @@
+import argparse
+import bz2
+import hashlib
+import random
+from xml.sax.saxutils import escape, quoteattr
+
+_HEADER = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11" xml:lang="en">
+  <siteinfo>
+    <sitename>Wikipedia</sitename>
+    <dbname>enwiki</dbname>
+    <base>https://en.wikipedia.org/wiki/Main_Page</base>
+  </siteinfo>
+"""
+_FOOTER = "</mediawiki>\n"
+_WORDS = (
+    "the of and in to a was is for on as by with from at his that it an were "
+    "which are this also be had first one has their its after new who they "
+    "two her she been other when time during there into school more may years"
+).split()
+_BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def sha1Base36(text: str) -> str:
+    """The revision sha1 the way dumps write it, base 36 and 31 digits."""
+    value = int(hashlib.sha1(text.encode("utf-8")).hexdigest(), 16)
+    digits = []
+    while value:
+        value, digit = divmod(value, 36)
+        digits.append(_BASE36[digit])
+    return "".join(reversed(digits)).rjust(31, "0")
+
+
+class SyntheticDump:
+    """
+    Deterministic pages-articles XML. The same parameters and seed always
+    produce the same bytes, so benchmark runs on different commits compare.
+    """
+
+    def __init__(
+        self,
+        numPages: int = 10000,
+        textSize: int = 3000,
+        linksPerPage: int = 25,
+        redirectRatio: float = 0.1,
+        seed: int = 0,
+    ):
+        self.numPages = numPages
+        self.textSize = textSize
+        """Approximate characters of wikitext per article."""
+
+        self.linksPerPage = linksPerPage
+        self.redirectRatio = redirectRatio
+        self.seed = seed
+        self.titles = [f"Article {i}" for i in range(numPages)]
+
+    def _link(self, rng: random.Random) -> str:
+        """One wikilink in one of the forms real articles use."""
+        target = self.titles[rng.randrange(self.numPages)]
+        kind = rng.random()
+        if kind < 0.5:
+            return f"[[{target}]]"
+        if kind < 0.75:
+            return f"[[{target}|{rng.choice(_WORDS)} {rng.choice(_WORDS)}]]"
+        if kind < 0.85:
+            return f"[[{target.replace(' ', '_')}#History|history]]"
+        if kind < 0.93:
+            return f"[[File:Image {rng.randrange(1000)}.jpg|thumb|A caption with [[{target}]]]]"
+        return f"[[Category:{rng.choice(_WORDS).title()} topics]]"
+
+    def _text(self, rng: random.Random) -> str:
+        parts = ["{{Infobox thing|name=Example|image=Example.png}}\n"]
+        length = len(parts[0])
+        linkEvery = max(self.textSize // max(self.linksPerPage, 1), 1)
+        nextLink = linkEvery
+        while length < self.textSize:
+            if length >= nextLink:
+                part = self._link(rng)
+                nextLink += linkEvery
+            elif rng.random() < 0.02:
+                part = f"<ref>{{{{cite web|url=https://example.org/{rng.randrange(10**6)}}}}}</ref>"
+            else:
+                part = rng.choice(_WORDS)
+            parts.append(part)
+            length += len(part) + 1
+        return " ".join(parts)
+
+    def _page(self, rng: random.Random, i: int) -> str:
+        title = self.titles[i]
+        redirect = ""
+        if rng.random() < self.redirectRatio:
+            target = self.titles[rng.randrange(self.numPages)]
+            redirect = f"    <redirect title={quoteattr(target)} />\n"
+            text = f"#REDIRECT [[{target}]]"
+        else:
+            text = self._text(rng)
+        return (
+            f"  <page>\n    <title>{escape(title)}</title>\n    <ns>0</ns>\n"
+            f"    <id>{i + 1}</id>\n{redirect}    <revision>\n"
+            f"      <id>{i + 1000000}</id>\n"
+            f"      <timestamp>2024-01-01T00:00:00Z</timestamp>\n"
+            f"      <model>wikitext</model>\n      <format>text/x-wiki</format>\n"
+            f'      <text bytes="{len(text.encode("utf-8"))}" xml:space="preserve">'
+            f"{escape(text)}</text>\n"
+            f"      <sha1>{sha1Base36(text)}</sha1>\n    </revision>\n  </page>\n"
+        )
+
+    def pages(self):
+        """Yield every page's XML in id order."""
+        rng = random.Random(self.seed)
+        for i in range(self.numPages):
+            yield self._page(rng, i)
+
+    def write(self, filePath: str, compression: str | None = None, pagesPerStream: int = 100):
+        """
+        Write the dump as plain XML, as one bz2 stream ("bz2") or as a
+        multistream dump with its index ("multistream", the index goes to
+        filePath + ".index.bz2" in the real "offset:pageId:title" format).
+        """
+        if compression is None:
+            with open(filePath, "w", encoding="utf-8") as f:
+                f.write(_HEADER)
+                f.writelines(self.pages())
+                f.write(_FOOTER)
+        elif compression == "bz2":
+            with bz2.open(filePath, "wt", encoding="utf-8") as f:
+                f.write(_HEADER)
+                f.writelines(self.pages())
+                f.write(_FOOTER)
+        elif compression == "multistream":
+            index = []
+            with open(filePath, "wb") as f:
+                f.write(bz2.compress(_HEADER.encode("utf-8")))
+                stream = []
+                for i, page in enumerate(self.pages()):
+                    stream.append(page)
+                    if len(stream) == pagesPerStream or i == self.numPages - 1:
+                        offset = f.tell()
+                        first = i + 1 - len(stream)
+                        index += [
+                            f"{offset}:{j + 1}:{self.titles[j]}\n"
+                            for j in range(first, i + 1)
+                        ]
+                        f.write(bz2.compress("".join(stream).encode("utf-8")))
+                        stream = []
+                f.write(bz2.compress(_FOOTER.encode("utf-8")))
+            with bz2.open(filePath + ".index.bz2", "wt", encoding="utf-8") as f:
+                f.writelines(index)
+        else:
+            raise ValueError(f"Unknown compression {compression!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic pages-articles dump.")
+    parser.add_argument("output")
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--text-size", type=int, default=3000)
+    parser.add_argument("--links", type=int, default=25, help="links per article")
+    parser.add_argument("--redirect-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compression", choices=("bz2", "multistream"), default=None)
+    args = parser.parse_args()
+
+    SyntheticDump(
+        args.pages, args.text_size, args.links, args.redirect_ratio, args.seed
+    ).write(args.output, args.compression)
@@ -0,0 +1,191 @@
+import json
+import multiprocessing as mp
+import os
+import time
+
+STAGES = ("decompress", "parse", "extract", "write")
+# per stage: first/last activity (epoch seconds), totals, and time spent
+# waiting on the neighbouring stages. Busy time is active time minus blocked.
+FIELDS = ("start", "end", "bytes", "pages", "links", "blocked")
+_START, _END, _BYTES, _PAGES, _LINKS, _BLOCKED = range(len(FIELDS))
+
+
+class StageCounters:
+    """
+    One stage's slice of the shared counter block. Each slice is updated by
+    a single process, so plain stores are enough and no lock is taken.
+    """
+
+    def __init__(self, block, index: int):
+        self._block = block
+        self._base = index * len(FIELDS)
+
+    def begin(self):
+        """Mark the stage as started, before it waits for its first input."""
+        if not self._block[self._base + _START]:
+            self._block[self._base + _START] = time.time()
+
+    def count(self, pages: int = 0, links: int = 0, nbytes: int = 0):
+        block, base = self._block, self._base
+        now = time.time()
+        if not block[base + _START]:
+            block[base + _START] = now
+        block[base + _END] = now
+        block[base + _PAGES] += pages
+        block[base + _LINKS] += links
+        block[base + _BYTES] += nbytes
+
+    def blocked(self, seconds: float):
+        """
+        Add time spent waiting for input or for room downstream. A stage that
+        was not begun starts when this wait did, so the wait counts as
+        active time and busy time stays active minus blocked.
+        """
+        block, base = self._block, self._base
+        if not block[base + _START]:
+            block[base + _START] = time.time() - seconds
+        block[base + _BLOCKED] += seconds
+
+
+class CountingReader:
+    """
+    Wraps a decompressed stream, counting bytes against the decompress stage
+    and the time spent waiting for them against the reading stage.
+    """
+
+    def __init__(self, stream, decompress: StageCounters, reader: StageCounters):
+        self._stream = stream
+        self._decompress = decompress
+        self._reader = reader
+
+    def read(self, size: int = -1) -> bytes:
+        t0 = time.perf_counter()
+        data = self._stream.read(size)
+        self._reader.blocked(time.perf_counter() - t0)
+        self._decompress.count(nbytes=len(data))
+        return data
+
+
+class Telemetry:
+    """
+    Per-stage counters in a shared-memory block (a RawArray of doubles) that
+    every pipeline process writes to and the main process snapshots. Each
+    stage has slots counter slices, one per process of a multi-process
+    stage, which read() adds together.
+    """
+
+    def __init__(self, slots: int = 1):
+        self.slots = slots
+        self._block = mp.RawArray("d", len(STAGES) * slots * len(FIELDS))
+
+    def stage(self, name: str, slot: int = 0) -> StageCounters:
+        return StageCounters(self._block, STAGES.index(name) * self.slots + slot)
+
+    def readSlots(self, name: str) -> list[dict[str, float]]:
+        """The counters of every slot of one stage."""
+        first = STAGES.index(name) * self.slots * len(FIELDS)
+        values = self._block[first : first + self.slots * len(FIELDS)]
+        return [
+            dict(zip(FIELDS, values[i * len(FIELDS) : (i + 1) * len(FIELDS)]))
+            for i in range(self.slots)
+        ]
+
+    def read(self) -> dict[str, dict[str, float]]:
+        """Every stage's counters summed over its slots, plus its busy time."""
+        totals = {}
+        for stage in STAGES:
+            slots = self.readSlots(stage)
+            starts = [c["start"] for c in slots if c["start"]]
+            total = {f: sum(c[f] for c in slots) for f in ("bytes", "pages", "links", "blocked")}
+            total["start"] = min(starts) if starts else 0.0
+            total["end"] = max(c["end"] for c in slots)
+            total["busy"] = sum(
+                max(c["end"] - c["start"] - c["blocked"], 0.0) for c in slots if c["start"]
+            )
+            totals[stage] = total
+        return totals
+
+
+class TelemetryReporter:
+    """
+    Turns Telemetry counters plus queue occupancy into periodic snapshots:
+    a JSON file and a Prometheus textfile-collector file, both replaced
+    atomically, and a summary table at the end of the run.
+    """
+
+    def __init__(
+        self,
+        telemetry: Telemetry,
+        queues: dict | None = None,
+        jsonPath: str = "Logs/telemetry.json",
+        promPath: str = "Logs/telemetry.prom",
+    ):
+        self.telemetry = telemetry
+        self.queues = queues or {}
+        self.jsonPath = jsonPath
+        self.promPath = promPath
+        self._last = (time.time(), telemetry.read())
+
+    def snapshot(self) -> dict:
+        """Totals, rates since the previous snapshot and queue sizes."""
+        now, counters = time.time(), self.telemetry.read()
+        lastTime, lastCounters = self._last
+        self._last = (now, counters)
+        interval = max(now - lastTime, 1e-9)
+        stages = {}
+        for stage, c in counters.items():
+            previous = lastCounters[stage]
+            stages[stage] = {
+                "bytes": int(c["bytes"]),
+                "pages": int(c["pages"]),
+                "links": int(c["links"]),
+                "bytes_per_s": (c["bytes"] - previous["bytes"]) / interval,
+                "pages_per_s": (c["pages"] - previous["pages"]) / interval,
+                "links_per_s": (c["links"] - previous["links"]) / interval,
+                "busy_s": c["busy"],
+                "blocked_s": c["blocked"],
+            }
+        queues = {}
+        for name, q in self.queues.items():
+            try:
+                queues[name] = q.qsize()
+            except (OSError, EOFError, NotImplementedError):
+                queues[name] = -1  # manager gone or qsize unsupported
+        return {"time": now, "stages": stages, "queues": queues}
+
+    def write(self) -> dict:
+        snapshot = self.snapshot()
+        _replace(self.jsonPath, json.dumps(snapshot, indent=2))
+        lines = []
+        for stage, values in snapshot["stages"].items():
+            for key, value in values.items():
+                lines.append(f'wikilinks_stage_{key}{{stage="{stage}"}} {value:.6g}')
+        for name, size in snapshot["queues"].items():
+            lines.append(f'wikilinks_queue_size{{queue="{name}"}} {size}')
+        _replace(self.promPath, "\n".join(lines) + "\n")
+        return snapshot
+
+    def summary(self) -> str:
+        """End-of-run table of average throughput, busiest stage first."""
+        rows = []
+        for stage, c in self.telemetry.read().items():
+            active = c["end"] - c["start"] if c["start"] else 0.0
+            busy = c["busy"]
+            rate = 1 / active if active else 0.0
+            rows.append(
+                (
+                    busy,
+                    f"{stage:<10} {c['bytes'] * rate / 1024**2:>9.2f} MB/s "
+                    f"{c['pages'] * rate:>10.0f} pages/s {c['links'] * rate:>11.0f} links/s "
+                    f"busy {busy:>8.1f}s blocked {c['blocked']:>8.1f}s",
+                )
+            )
+        rows.sort(reverse=True)
+        return "\n".join(line for _, line in rows)
+
+
+def _replace(filePath: str, text: str):
+    tmpPath = filePath + ".tmp"
+    with open(tmpPath, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmpPath, filePath)
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+def normalizeTitle(title: str) -> str:
+    """
+    Normalize a title the way MediaWiki does: underscores are spaces, runs of
+    whitespace collapse, the ends are trimmed and the first letter is upper case.
+    A leading ':' (as in [[:Category:X]]) is dropped.
+    """
+    title = " ".join(title.replace("_", " ").split())
+    if title[:1] == ":":
+        title = title[1:].lstrip()
+    return title[:1].upper() + title[1:]
+
+
+class TitleDictionary:
+    """Assigns compact integer ids to normalized titles as they are first seen."""
+
+    def __init__(self, titles: list[str] | None = None):
+        self.titles: list[str] = titles or []
+        """Normalized titles, indexed by id."""
+
+        self._ids: dict[str, int] = {t: i for i, t in enumerate(self.titles)}
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def getId(self, title: str) -> int:
+        """Return the id of title, assigning the next free id if it is new."""
+        return self.getNormalizedId(normalizeTitle(title))
+
+    def getNormalizedId(self, title: str) -> int:
+        """getId for a title that is already normalized, e.g. by another dictionary."""
+        titleId = self._ids.get(title)
+        if titleId is None:
+            titleId = self._ids[title] = len(self.titles)
+            self.titles.append(title)
+        return titleId
+
+    def find(self, title: str) -> int | None:
+        """Return the id of title, or None without assigning one."""
+        return self._ids.get(normalizeTitle(title))
+
+    def idsOf(self, titles: list[str]) -> np.ndarray:
+        """Return the de-duplicated ids of titles as an int32 array."""
+        getId = self.getId
+        return np.fromiter(dict.fromkeys(getId(t) for t in titles), dtype=np.int32)
+
+    def save(self, filePath: str):
+        """Write the titles one per line, line number = id."""
+        with open(filePath, "w", encoding="utf-8") as f:
+            for title in self.titles:
+                f.write(title)
+                f.write("\n")
+
+    @classmethod
+    def load(cls, filePath: str) -> "TitleDictionary":
+        with open(filePath, encoding="utf-8") as f:
+            return cls(f.read().splitlines())
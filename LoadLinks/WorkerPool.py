@@ -0,0 +1,126 @@
+import multiprocessing as mp
+import os
+import time
+
+from Telemetry import Telemetry
+
+
+class AdaptiveWorkerPool:
+    """
+    Runs target(slot, pills, *args) in worker processes, starting more while
+    the input queue backs up with every worker busy and retiring them while
+    workers sit waiting for input, i.e. when the producer is the bottleneck.
+
+    Workers stop on the "Done" pill: exactly one is sent per worker, and
+    each worker counts the pills it takes in its pills slot, so shutdown()
+    can check that every worker received one and exited cleanly. Worker
+    slots index both pills and the per-worker telemetry slices.
+    """
+
+    def __init__(
+        self,
+        target,
+        args: tuple,
+        inputQueue,
+        telemetry: Telemetry,
+        maxWorkers: int | None = None,
+        minWorkers: int = 1,
+        interval: float = 1.0,
+        stage: str = "extract",
+    ):
+        self.target = target
+        self.args = args
+        self.inputQueue = inputQueue
+        self.telemetry = telemetry
+        self.maxWorkers = min(maxWorkers or os.cpu_count() or 1, telemetry.slots)
+        self.minWorkers = min(minWorkers, self.maxWorkers)
+        self.interval = interval
+        self.stage = stage
+        self.pills = mp.RawArray("i", telemetry.slots)
+        """Pills taken, by worker slot."""
+
+        self.pillsSent = 0
+        self.workers: dict[int, mp.Process] = {}
+        self.started = 0
+        self._lastBlocked: dict[int, float] = {}
+        self._lastAdjust = time.time()
+        self._cooldown = 0
+
+    def _spawn(self):
+        slot = self.started
+        self.started += 1
+        process = mp.Process(
+            target=self.target,
+            args=(slot, self.pills, *self.args),
+            name=f"WorkerProcess-{slot}",
+        )
+        process.start()
+        self.workers[slot] = process
+        self._lastBlocked[slot] = 0.0
+
+    def start(self):
+        for _ in range(self.minWorkers):
+            self._spawn()
+
+    def live(self) -> int:
+        """Workers that have not been sent their pill yet."""
+        return self.started - self.pillsSent
+
+    def canGrow(self) -> bool:
+        return self.live() < self.maxWorkers and self.started < self.telemetry.slots
+
+    def retire(self):
+        """Stop one worker, whichever takes the pill first."""
+        self.inputQueue.put("Done")
+        self.pillsSent += 1
+
+    def adjust(self) -> int:
+        """
+        One scheduling decision from the time since the last call: +1 if a
+        worker was started, -1 if one was retired, otherwise 0.
+        """
+        now = time.time()
+        elapsed, self._lastAdjust = now - self._lastAdjust, now
+        slots = self.telemetry.readSlots(self.stage)
+        waited = 0.0
+        for slot in self.workers:
+            waited += slots[slot]["blocked"] - self._lastBlocked[slot]
+            self._lastBlocked[slot] = slots[slot]["blocked"]
+        utilization = 1.0 - waited / (elapsed * max(self.live(), 1))
+        try:
+            depth = self.inputQueue.qsize()
+            capacity = getattr(self.inputQueue, "numSlots", 0) or depth or 1
+            backedUp, drained = depth >= 0.75 * capacity, depth == 0
+        except NotImplementedError:
+            backedUp = drained = True  # mp.Queue on macOS: go by utilization alone
+
+        if self._cooldown:
+            self._cooldown -= 1  # let the last change show up in the counters
+            return 0
+        if backedUp and utilization > 0.8 and self.canGrow():
+            self._spawn()
+            self._cooldown = 2
+            return 1
+        if drained and utilization < 0.5 and self.live() > self.minWorkers:
+            self.retire()
+            self._cooldown = 2
+            return -1
+        return 0
+
+    def shutdown(self, pillsSent: int = 0) -> dict[int, tuple[int, int | None]]:
+        """
+        Send the remaining pills and wait for every worker. pillsSent counts
+        pills other processes already put on the queue (the loader's "Done").
+        Returns {slot: (pills taken, exit code)} and warns about any worker
+        that did not take exactly one pill or exit cleanly.
+        """
+        self.pillsSent += pillsSent
+        while self.pillsSent < self.started:
+            self.retire()
+        report = {}
+        for slot, process in self.workers.items():
+            process.join()
+            report[slot] = (self.pills[slot], process.exitcode)
+            if report[slot] != (1, 0):
+                print(f"[Pool] Worker {slot} took {self.pills[slot]} pills, exit code {process.exitcode}")
+        return report
@@ -0,0 +1,213 @@
+import argparse
+import io
+import json
+import os
+import platform
+import queue
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from BZ2Streams import BZ2StreamWrapper, MultistreamBZ2Wrapper
+from CompressedLoader import BatchInterner, deQueueAll, extractLinksFromText
+from linkExtractorSpeedtest import findallClean
+from PageScanner import scanPages
+from RecordFile import RecordWriter, encodeTitleLinks
+from scannerSpeedtest import iterparsePages, scannerPages
+from SyntheticDump import SyntheticDump
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LinkConnector"))
+from Grapher import create_graph
+
+
+def readAll(stream) -> float:
+    """Read the stream to the end, returning the megabytes read."""
+    size = 0
+    with stream:
+        while block := stream.read(1024 * 1024):
+            size += len(block)
+    return size / 1024**2
+
+
+class BenchmarkContext:
+    """The synthetic dump in every form the stages read, built once per run."""
+
+    def __init__(self, directory: str, dump: SyntheticDump):
+        self.xmlPath = os.path.join(directory, "dump.xml")
+        self.bz2Path = os.path.join(directory, "dump.xml.bz2")
+        self.multistreamPath = os.path.join(directory, "multistream.xml.bz2")
+        self.recordsPath = os.path.join(directory, "links.rec")
+        self.outputPath = os.path.join(directory, "output.bin")
+        dump.write(self.xmlPath)
+        dump.write(self.bz2Path, "bz2")
+        dump.write(self.multistreamPath, "multistream")
+
+        with open(self.xmlPath, "rb") as f:
+            self.xml = f.read()
+        self.pages = [
+            (page.title, page.text)
+            for page in scanPages(io.BytesIO(self.xml))
+            if page.text and page.redirect is None
+        ]
+        self.texts = [text for _, text in self.pages]
+        self.textBytes = sum(len(t.encode("utf-8")) for t in self.texts)
+        self.links = [(title, extractLinksFromText(text)) for title, text in self.pages]
+        with RecordWriter(self.recordsPath) as f:
+            for title, links in self.links:
+                f.write(encodeTitleLinks(title, links))
+        # extraction workers' results, as CompressedLoader's writer receives them
+        interner = BatchInterner(0)
+        results = [(title, None, links) for title, links in self.links]
+        self.resultBatches = [
+            interner.encode(results[i : i + 1000]) for i in range(0, len(results), 1000)
+        ]
+
+
+def _extract(ctx: BenchmarkContext, extract) -> float:
+    for text in ctx.texts:
+        extract(text)
+    return ctx.textBytes / 1024**2
+
+
+def _writeEdges(ctx: BenchmarkContext) -> float:
+    q: queue.Queue = queue.Queue()
+    for batch in ctx.resultBatches:
+        q.put(batch)
+    q.put(None)
+    deQueueAll(q, ctx.outputPath, ctx.outputPath + ".titles", ctx.outputPath + ".redirects")
+    return os.path.getsize(ctx.outputPath) / 1024**2
+
+
+def _writeRecords(ctx: BenchmarkContext, compression: str | None) -> int:
+    with RecordWriter(ctx.outputPath, compression) as f:
+        for title, links in ctx.links:
+            f.write(encodeTitleLinks(title, links))
+    return len(ctx.links)
+
+
+# name: (stage, unit, function returning the amount of work done)
+BENCHMARKS = {
+    "decompress.single": ("decompress", "MB", lambda c: readAll(BZ2StreamWrapper(c.bz2Path))),
+    "decompress.multistream": (
+        "decompress",
+        "MB",
+        lambda c: readAll(
+            MultistreamBZ2Wrapper(c.multistreamPath, c.multistreamPath + ".index.bz2")
+        ),
+    ),
+    "parse.iterparse": ("parse", "pages", lambda c: iterparsePages(c.xmlPath)),
+    "parse.scanner": ("parse", "pages", lambda c: scannerPages(c.xmlPath)),
+    "extract.regex": ("extract", "MB", lambda c: _extract(c, extractLinksFromText)),
+    "extract.clean_wikilink": ("extract", "MB", lambda c: _extract(c, findallClean)),
+    "write.records": ("write", "pages", lambda c: _writeRecords(c, None)),
+    "write.records_zlib": ("write", "pages", lambda c: _writeRecords(c, "zlib")),
+    "write.edges": ("write", "MB", _writeEdges),  # includes remapping to global ids
+    "graph.create_graph": (
+        "graph", "edges", lambda c: create_graph(c.recordsPath).number_of_edges()
+    ),
+}
+
+
+def runBenchmarks(
+    ctx: BenchmarkContext, names: list[str] | None = None, repeats: int = 3
+) -> dict[str, dict]:
+    """Run each benchmark repeats times, reporting the median and best time."""
+    results = {}
+    for name in names or BENCHMARKS:
+        stage, unit, run = BENCHMARKS[name]
+        times = []
+        for _ in range(repeats):
+            startTime = time.perf_counter()
+            amount = run(ctx)
+            times.append(time.perf_counter() - startTime)
+        median = statistics.median(times)
+        results[name] = {
+            "stage": stage,
+            "unit": unit,
+            "amount": amount,
+            "median_s": median,
+            "min_s": min(times),
+            "throughput": amount / median,
+        }
+        print(f"{name: <24} {amount / median:>14.2f} {unit}/s  (median {median:.3f}s)")
+    return results
+
+
+def gitCommit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compareResults(baseline: dict, current: dict, threshold: float = 0.1) -> list[str]:
+    """
+    Print throughput ratios against a baseline run and return the
+    benchmarks that slowed down by more than threshold.
+    """
+    if baseline["params"] != current["params"]:
+        print("Warning: the runs used different dump parameters")
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["throughput"] / baseline["results"][name]["throughput"]
+        flag = ""
+        if ratio < 1 - threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name: <24} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage benchmarks on a synthetic dump.")
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--text-size", type=int, default=3000)
+    parser.add_argument("--links", type=int, default=25, help="links per article")
+    parser.add_argument("--redirect-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown counted as a regression")
+    args = parser.parse_args()
+
+    params = {
+        "pages": args.pages,
+        "text_size": args.text_size,
+        "links": args.links,
+        "redirect_ratio": args.redirect_ratio,
+        "seed": args.seed,
+    }
+    dump = SyntheticDump(args.pages, args.text_size, args.links, args.redirect_ratio, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        ctx = BenchmarkContext(directory, dump)
+        current = {
+            "commit": gitCommit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "params": params,
+            "results": runBenchmarks(ctx, args.only, args.repeats),
+        }
+
+    output = args.output or f"benchmark-{current['commit'] or 'local'}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compareResults(baseline, current, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,64 @@
+import ast
+import re
+import sys
+import time
+
+from LinkExtractor import extractLinks, extractLinksBatch
+from PageScanner import scanPages
+from STCompressedLoader import clean_wikilink
+
+
+def loadCorpus(filePath: str) -> list[str]:
+    """Page texts from a dump (.xml) or a single saved page text (test.txt)."""
+    if filePath.endswith(".xml"):
+        with open(filePath, "rb") as f:
+            return [page.text for page in scanPages(f) if page.text]
+    with open(filePath, encoding="utf-8") as f:
+        text = f.read()
+    if text[:1] in "'\"":
+        text = ast.literal_eval(text)
+    return [text]
+
+
+def findallClean(text: str) -> list[str]:
+    """The previous extractor, re.findall followed by clean_wikilink."""
+    links = set()
+    for link in re.findall(r"\[\[.*?\]\]", text or ""):
+        cleaned_link = clean_wikilink(link)
+        if cleaned_link:
+            links.add(cleaned_link)
+    return list(links)
+
+
+def oldLinks(text: str) -> set[str]:
+    """findallClean, with anchors stripped the way extractLinks does."""
+    links = set()
+    for link in findallClean(text):
+        link = link.split("#")[0].strip()
+        if link:
+            links.add(link)
+    return links
+
+
+if __name__ == "__main__":
+    texts = loadCorpus(sys.argv[1] if len(sys.argv) > 1 else "test.txt")
+    megabytes = sum(len(t.encode("utf-8")) for t in texts) / 1024**2
+
+    differing = 0
+    for text in texts:
+        old, new = oldLinks(text), set(extractLinks(text))
+        if not old <= new:  # new may only add links nested in captions
+            differing += 1
+            print(f"Missing links: {sorted(old - new)[:10]}")
+    print(f"{len(texts)} pages, {differing} differ from findall + clean_wikilink")
+
+    repeats = max(1, int(50 / max(megabytes, 0.01)))
+    for name, run in (
+        ("old", lambda: [findallClean(t) for t in texts]),
+        ("new", lambda: extractLinksBatch(texts)),
+    ):
+        startTime = time.perf_counter()
+        for _ in range(repeats):
+            run()
+        elapsed = time.perf_counter() - startTime
+        print(f"{name}: {megabytes * repeats / elapsed:.2f} MB of wikitext per second")
@@ -0,0 +1,45 @@
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from PageScanner import scanPages
+
+
+def iterparsePages(filePath: str) -> int:
+    """Count pages the way the loaders read them, with ET.iterparse."""
+    pages = 0
+    with open(filePath, "rb") as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        title = ""
+        for event, elem in context:
+            if event == "end":
+                if elem.tag[-5:] == "title":
+                    title = elem.text or ""
+                elif elem.tag[-4:] == "text":
+                    if title:
+                        pages += 1
+                elif elem.tag[-4:] == "page":
+                    root.clear()
+    return pages
+
+
+def scannerPages(filePath: str) -> int:
+    """Count pages with the byte-level PageScanner."""
+    pages = 0
+    with open(filePath, "rb") as f:
+        for page in scanPages(f):
+            if page.title:
+                pages += 1
+    return pages
+
+
+if __name__ == "__main__":
+    filePath = sys.argv[1] if len(sys.argv) > 1 else "wikipedia.xml"
+    for name, parser in (("iterparse", iterparsePages), ("scanner", scannerPages)):
+        startTime = time.perf_counter()
+        pages = parser(filePath)
+        elapsed = time.perf_counter() - startTime
+        print(
+            f"{name: <10} {pages} pages in {elapsed:.2f} seconds, {pages / elapsed:.2f} pages per second"
+        )
@@ -0,0 +1,25 @@
+import numpy as np
+
+from Betweenness import approximate_betweenness
+from CSRGraph import csr_from_edges, write_csr
+
+
+def _write(path, num_nodes, edges):
+    edges = np.array(edges, dtype=np.int32).reshape(-1, 2)
+    write_csr(str(path), *csr_from_edges(edges, num_nodes), [str(v) for v in range(num_nodes)])
+
+
+def test_scores_do_not_depend_on_the_worker_count(tmp_path):
+    rng = np.random.default_rng(1)
+    _write(tmp_path / "g.csr", 200, rng.integers(0, 200, size=(1500, 2)))
+    one = approximate_betweenness(str(tmp_path / "g.csr"), 150, seed=3, workers=1)
+    three = approximate_betweenness(str(tmp_path / "g.csr"), 150, seed=3, workers=3)
+    assert one.scores.any()
+    assert np.array_equal(one.scores, three.scores)
+
+
+def test_tiny_graphs_have_no_betweenness(tmp_path):
+    for n, edges in ((1, []), (2, [(0, 1), (1, 0)])):
+        _write(tmp_path / f"g{n}.csr", n, edges)
+        result = approximate_betweenness(str(tmp_path / f"g{n}.csr"), 10, workers=1)
+        assert np.array_equal(result.scores, np.zeros(n))
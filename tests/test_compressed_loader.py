@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from BatchTransport import SharedBatchQueue, packIdBatch, unpackIdBatch
+from CompressedLoader import BatchInterner, deQueueAll
+from RedirectTable import RedirectTable
+from TitleDictionary import TitleDictionary
+
+# (title, redirect, links) pages as the workers extract them
+PAGES = [
+    [("Alpha", None, ["Beta", "Gamma"]), ("Old beta", "Beta", [])],
+    [("Beta", None, ["alpha", "Delta", "Beta"]), ("Gamma", None, [])],
+    [("Delta", None, ["Old beta", "Alpha"])],
+]
+
+
+def _load(tmp_path) -> tuple[set, set]:
+    """The written edges and redirects as title pairs."""
+    titles = TitleDictionary.load(str(tmp_path / "titles.txt")).titles
+    edges = np.fromfile(tmp_path / "edges.bin", dtype=np.int32).reshape(-1, 2)
+    redirects = RedirectTable.load(str(tmp_path / "redirects.bin"))
+    return (
+        {(titles[u], titles[v]) for u, v in edges.tolist()},
+        {(titles[u], titles[v]) for u, v in zip(redirects.sources, redirects.targets)},
+    )
+
+
+@pytest.mark.parametrize("maxTitles", [1 << 19, 2])
+def test_writer_remaps_every_workers_ids(tmp_path, maxTitles):
+    results = SharedBatchQueue(numSlots=4, slotSize=4096, pack=packIdBatch, unpack=unpackIdBatch)
+    try:
+        # two workers with their own dictionaries, batches interleaved;
+        # maxTitles=2 makes the workers reset their dictionaries between batches
+        workers = [BatchInterner(0, maxTitles), BatchInterner(1, maxTitles)]
+        for i, pages in enumerate(PAGES):
+            results.put(workers[i % 2].encode(pages))
+        results.put(None)
+        deQueueAll(
+            results,
+            str(tmp_path / "edges.bin"),
+            str(tmp_path / "titles.txt"),
+            str(tmp_path / "redirects.bin"),
+        )
+    finally:
+        results.close()
+
+    edges, redirects = _load(tmp_path)
+    assert edges == {
+        ("Alpha", "Beta"),
+        ("Alpha", "Gamma"),
+        ("Beta", "Alpha"),
+        ("Beta", "Delta"),
+        ("Beta", "Beta"),
+        ("Delta", "Old beta"),
+        ("Delta", "Alpha"),
+    }
+    assert redirects == {("Old beta", "Beta")}
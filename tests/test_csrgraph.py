@@ -0,0 +1,60 @@
+import numpy as np
+
+from CSRGraph import CSRGraph, csr_from_edges, patch_csr, write_csr
+from TitleTable import write_title_table
+
+
+def _write(path, titles, edges):
+    edges = np.array(edges, dtype=np.int32).reshape(-1, 2)
+    write_csr(str(path), *csr_from_edges(edges, len(titles)), titles)
+
+
+def _links(path) -> dict[str, list[str]]:
+    with CSRGraph(str(path)) as G:
+        return {G.title(v): [G.title(int(t)) for t in G.neighbors(v)] for v in range(G.num_nodes)}
+
+
+def test_patch_ignores_removed_titles_the_graph_does_not_know(tmp_path):
+    _write(tmp_path / "g.csr", ["A", "B", "C"], [(0, 1), (1, 2)])
+    patch_csr(str(tmp_path / "g.csr"), str(tmp_path / "g2.csr"), {"A": ["C"]}, ["Zzz"])
+    assert _links(tmp_path / "g2.csr") == {"A": ["C"], "B": ["C"], "C": []}
+
+
+def test_patch_removes_and_appends(tmp_path):
+    _write(tmp_path / "g.csr", ["A", "B", "C"], [(0, 1), (1, 2), (2, 0)])
+    patch_csr(str(tmp_path / "g.csr"), str(tmp_path / "g2.csr"), {"D": ["A", "B"]}, ["B"])
+    assert _links(tmp_path / "g2.csr") == {"A": ["B"], "B": [], "C": ["A"], "D": ["A", "B"]}
+
+
+def test_patch_keeps_existing_self_loops_when_resolving_redirects(tmp_path):
+    _write(tmp_path / "g.csr", ["A", "B", "R"], [(0, 0), (0, 1)])
+    (tmp_path / "r.tsv").write_text("R\tB\n", encoding="utf-8")
+    patch_csr(
+        str(tmp_path / "g.csr"), str(tmp_path / "g2.csr"), {"B": ["R", "A"]},
+        redirects_path=str(tmp_path / "r.tsv"),
+    )
+    assert _links(tmp_path / "g2.csr") == {"A": ["A", "B"], "B": ["A"], "R": []}
+
+
+def _write_titles(path, graph_path):
+    with CSRGraph(str(graph_path)) as G:
+        titles, digest = [G.title(v) for v in range(G.num_nodes)], G.digest
+    write_title_table(str(path), titles, graph_digest=digest)
+
+
+def test_title_table_is_used_for_its_own_graph(tmp_path):
+    _write(tmp_path / "g.csr", ["A", "B"], [(0, 1)])
+    _write_titles(tmp_path / "g.csr.titles", tmp_path / "g.csr")
+    with CSRGraph(str(tmp_path / "g.csr")) as G:
+        assert G.titles is not None
+        assert G.find("b") == 1
+
+
+def test_title_table_of_another_graph_is_ignored(tmp_path, capsys):
+    _write(tmp_path / "old.csr", ["A", "B"], [(0, 1)])
+    _write_titles(tmp_path / "g.csr.titles", tmp_path / "old.csr")
+    _write(tmp_path / "g.csr", ["B", "A"], [(0, 1), (1, 0)])  # same node count
+    with CSRGraph(str(tmp_path / "g.csr")) as G:
+        assert G.titles is None
+        assert G.find("A") == 1
+    assert "built for another graph" in capsys.readouterr().out
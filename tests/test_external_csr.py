@@ -0,0 +1,20 @@
+import numpy as np
+
+from CSRGraph import convert_edges
+from ExternalCSR import ExternalCSRBuilder, build_from_edges
+
+
+def test_many_runs_build_the_same_file_as_the_in_memory_converter(tmp_path):
+    rng = np.random.default_rng(0)
+    num_nodes = 3000
+    rng.integers(0, num_nodes, size=(20000, 2), dtype=np.int32).tofile(tmp_path / "edges.bin")
+    (tmp_path / "titles.txt").write_text(
+        "".join(f"Page {i}\n" for i in range(num_nodes)), encoding="utf-8"
+    )
+    builder = ExternalCSRBuilder(memory_limit=1 << 18, workers=2, tmp_dir=str(tmp_path))
+    build_from_edges(
+        str(tmp_path / "edges.bin"), str(tmp_path / "titles.txt"), str(tmp_path / "ext.csr"), builder=builder
+    )
+    convert_edges(str(tmp_path / "edges.bin"), str(tmp_path / "titles.txt"), str(tmp_path / "mem.csr"))
+    assert len(builder.runs["forward"]) > 2
+    assert (tmp_path / "ext.csr").read_bytes() == (tmp_path / "mem.csr").read_bytes()
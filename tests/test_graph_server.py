@@ -0,0 +1,54 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from CSRGraph import CSRGraph, csr_from_edges, write_csr
+from GraphServer import MAX_DEPTH, GraphRequestHandler, GraphService, LRUCache
+
+TITLES = ["A", "B", "C", "D"]
+EDGES = [(0, 1), (1, 2), (2, 3), (3, 0)]
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = str(tmp_path / "g.csr")
+    write_csr(path, *csr_from_edges(np.array(EDGES, dtype=np.int32), len(TITLES)), TITLES)
+    with CSRGraph(path) as G:
+        yield GraphService(G)
+
+
+def test_neighbors_at_every_depth(service):
+    assert service.neighbors("A", 3) == ["D"]
+    assert service.neighbors("A", 1) == ["B"]  # from the cached steps
+    assert service.backlinks("A", 2) == ["C"]
+    assert service.neighbors("A", MAX_DEPTH) == []
+
+
+def test_depth_out_of_range_is_a_bad_request(service):
+    handler = type("Handler", (GraphRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for depth in (-1, MAX_DEPTH + 1, 100000):
+            url = f"http://127.0.0.1:{server.server_port}/neighbors?title=A&depth={depth}"
+            with pytest.raises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(url)
+            assert e.value.code == 400
+            assert "depth" in json.load(e.value)["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_lru_cache_is_bounded_by_weight():
+    cache = LRUCache(100, lambda value: value.nbytes)
+    for key in range(5):
+        cache.put(key, np.zeros(10, dtype=np.int32))  # 40 bytes each
+    assert cache.stats()["size"] == 2
+    assert cache.weight == 80
+    assert cache.get(4) is not None and cache.get(2) is None
@@ -0,0 +1,39 @@
+import io
+
+from IncrementalLoader import ExtractionCache
+
+
+def _dump(*pages) -> io.BytesIO:
+    xml = ["<mediawiki>"]
+    for pageId, title, sha1, text in pages:
+        xml.append(
+            f"<page><title>{title}</title><ns>0</ns><id>{pageId}</id><revision>"
+            f"<sha1>{sha1}</sha1><text>{text}</text></revision></page>"
+        )
+    xml.append("</mediawiki>")
+    return io.BytesIO("\n".join(xml).encode("utf-8"))
+
+
+def test_update_reports_and_stores_only_what_changed(tmp_path):
+    with ExtractionCache(str(tmp_path / "cache.sqlite")) as cache:
+        first = cache.update(
+            _dump((1, "A", "a1", "[[B]]"), (2, "B", "b1", "[[A]]"), (3, "C", "c1", "[[A]]")),
+            batchSize=2,
+        )
+        assert (first.added, first.changed, first.deleted) == ([1, 2, 3], [], [])
+
+        second = cache.update(
+            _dump((1, "A", "a1", "[[B]]"), (2, "B2", "b1", "[[A]]"), (4, "D", "d1", "[[C]]")),
+            batchSize=2,
+        )
+        assert (second.added, second.changed, second.deleted) == ([4], [2], [3])
+        assert second.unchanged == 1
+        assert second.updated == {"B2": ["A"], "D": ["C"]}
+        assert sorted(second.removed) == ["B", "C"]
+        assert len(cache) == 3
+
+        cache.exportRecords(str(tmp_path / "links.rec"))
+        again = cache.update(
+            _dump((1, "A", "a1", "[[B]]"), (2, "B2", "b1", "[[A]]"), (4, "D", "d1", "[[C]]"))
+        )
+        assert again.unchanged == 3 and not again.updated and not again.removed
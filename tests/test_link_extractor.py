@@ -0,0 +1,26 @@
+from LinkExtractor import extractLinks, extractLinksBatch
+
+
+def test_links_need_their_closing_brackets():
+    assert extractLinks("[[Foo|bar") == []
+    assert extractLinks("[[Foo|bar\n]]") == []
+    assert extractLinks("[[Foo") == []
+    assert extractLinks("[[Foo|bar]]") == ["Foo"]
+
+
+def test_links_do_not_span_lines():
+    assert extractLinks("[[\nFoo]]") == []
+    assert extractLinks("[[Foo\n]]") == []
+    assert extractLinks("[[ Foo ]] [[Bar#Anchor| baz ]]") == ["Foo", "Bar"]
+
+
+def test_nested_links_and_skipped_namespaces():
+    text = "[[File:x.jpg|thumb|a [[Target]] caption]] [[Category:C]] [[target]] [[Target]]"
+    assert extractLinks(text) == ["Target", "target"]
+    assert extractLinksBatch([text, None, "[[A|b"]) == [["Target", "target"], [], []]
+
+
+def test_namespaces_are_skipped_after_leading_whitespace():
+    for text in ("[[ File:x.jpg|thumb]]", "[[ Category:Foo]]", "[[\tImage:a.png]]", "[[ wp:Bar|x]]"):
+        assert extractLinks(text) == []
+    assert extractLinks("[[  Foo]]") == ["Foo"]
@@ -0,0 +1,16 @@
+from PageFilter import PageFilter
+
+
+def _kept(pageFilter: PageFilter, pageIds) -> list[int]:
+    return [i for i in pageIds if not pageFilter.rejectsHeader(0, i, False)]
+
+
+def test_overlapping_id_ranges_are_merged():
+    pageFilter = PageFilter(idRanges=[(1, 100), (5, 10), (101, 120), (200, 300), (250, 260)])
+    assert pageFilter.idRanges == [(1, 120), (200, 300)]
+    assert _kept(pageFilter, [0, 1, 50, 100, 110, 121, 199, 255, 300, 301]) == [1, 50, 100, 110, 255, 300]
+
+
+def test_disjoint_id_ranges():
+    pageFilter = PageFilter(idRanges=[(20, 30), (1, 5)])
+    assert _kept(pageFilter, range(0, 35, 5)) == [5, 20, 25, 30]
@@ -0,0 +1,25 @@
+import os
+
+import ShardedExtractor
+import STCompressedLoader
+from RecordFile import decodeTitleLinks, readRecords
+from SyntheticDump import SyntheticDump
+
+
+def _read(recordsPath: str, redirectsPath: str) -> tuple[list, str]:
+    with open(redirectsPath, encoding="utf-8") as f:
+        return [decodeTitleLinks(r) for r in readRecords(recordsPath)], f.read()
+
+
+def test_sharded_output_matches_the_single_threaded_loader(tmp_path, monkeypatch):
+    dump = str(tmp_path / "dump.xml.bz2")
+    SyntheticDump(numPages=400, textSize=400, redirectRatio=0.2).write(dump, "bz2")
+    out = {name: (str(tmp_path / f"{name}.rec"), str(tmp_path / f"{name}.tsv")) for name in ("st", "sh")}
+    monkeypatch.chdir(tmp_path)  # the loaders' profiles go to Logs/
+    os.makedirs("Logs", exist_ok=True)
+    STCompressedLoader.loadXml(dump, out["st"][0], useScanner=True, redirectsFilePath=out["st"][1])
+    ShardedExtractor.loadXml(dump, out["sh"][0], numWorkers=2, redirectsFilePath=out["sh"][1])
+
+    (stRecords, stRedirects), (shRecords, shRedirects) = _read(*out["st"]), _read(*out["sh"])
+    assert shRecords == stRecords and stRecords
+    assert shRedirects == stRedirects and stRedirects
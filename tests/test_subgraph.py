@@ -0,0 +1,19 @@
+import networkx as nx
+import numpy as np
+
+from CSRGraph import CSRGraph, csr_from_edges, write_csr
+from Subgraph import k_hop_subgraph
+
+
+def test_subgraph_round_trips_through_graphml(tmp_path):
+    titles = ["A", "B", "C", "D"]
+    edges = np.array([(0, 1), (1, 2), (2, 3), (3, 0)], dtype=np.int32)
+    write_csr(str(tmp_path / "g.csr"), *csr_from_edges(edges, len(titles)), titles)
+    with CSRGraph(str(tmp_path / "g.csr")) as G:
+        S = k_hop_subgraph(G, ["A", "C"], k=1, direction="out")
+    nx.write_graphml(S, tmp_path / "s.graphml")
+    R = nx.read_graphml(tmp_path / "s.graphml")
+    assert R.graph["seeds"] == "A|C"
+    assert set(R.nodes) == {"A", "B", "C", "D"}
+    assert set(R.edges) == set(S.edges)
+    assert R.nodes["B"]["hop"] == 1 and R.nodes["A"]["hop"] == 0
@@ -0,0 +1,27 @@
+import time
+
+from Telemetry import Telemetry
+
+
+def _busyAfterSlowFirstInput(begin: bool) -> dict:
+    telemetry = Telemetry()
+    stage = telemetry.stage("extract")
+    if begin:
+        stage.begin()
+    t0 = time.perf_counter()
+    time.sleep(0.2)  # waiting for the first batch
+    stage.blocked(time.perf_counter() - t0)
+    time.sleep(0.1)  # working on it
+    stage.count(pages=1)
+    return telemetry.read()["extract"]
+
+
+def test_busy_excludes_only_the_wait_when_begun():
+    extract = _busyAfterSlowFirstInput(begin=True)
+    assert extract["blocked"] >= 0.2
+    assert 0.05 < extract["busy"] < 0.2
+
+
+def test_busy_without_begin_starts_at_the_first_wait():
+    extract = _busyAfterSlowFirstInput(begin=False)
+    assert 0.05 < extract["busy"] < 0.2
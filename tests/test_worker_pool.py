@@ -0,0 +1,32 @@
+import queue
+
+from BatchTransport import SharedBatchQueue
+from Telemetry import Telemetry
+from WorkerPool import AdaptiveWorkerPool
+
+
+class _NoQsizeQueue(queue.Queue):
+    """mp.Queue as it behaves on macOS."""
+
+    def qsize(self):
+        raise NotImplementedError
+
+
+def test_shared_batch_queue_counts_its_depth():
+    q = SharedBatchQueue(numSlots=2, slotSize=1024)
+    try:
+        q.put([("a", "b")])
+        q.put("Done")
+        assert q.qsize() == 2
+        assert q.get() == [("a", "b")]
+        assert q.qsize() == 1
+    finally:
+        q.close()
+
+
+def test_adjust_without_qsize_goes_by_utilization():
+    pool = AdaptiveWorkerPool(lambda *args: None, (), _NoQsizeQueue(), Telemetry(), maxWorkers=2)
+    spawned = []
+    pool._spawn = lambda: spawned.append(pool.started)
+    assert pool.adjust() == 1  # nobody waited for input: fully utilized
+    assert spawned == [0]